@@ -0,0 +1,130 @@
+import { useEffect } from "react";
+import { useQueryClient } from "@tanstack/react-query";
+import api from "./axios";
+import type { Plan, Task, TaskList } from "./types";
+
+type TaskPosition = Pick<Task, "_id" | "task_list_id" | "sort_number" | "rank">;
+
+type BoardEvent =
+  | { type: "task.created" | "task.updated" | "task.moved"; task: Task }
+  | { type: "task.deleted"; task_id: string }
+  | { type: "tasks.reordered"; tasks: TaskPosition[] }
+  | { type: "task_list.created" | "task_list.updated"; task_list: TaskList }
+  | { type: "task_list.deleted"; task_list_id: string }
+  | { type: "plan.updated"; plan: Plan }
+  | { type: "plan.deleted" | "resync" };
+
+const RECONNECT_DELAY_MS = 2000;
+
+function eventsUrl(plan_id: string) {
+  const url = new URL(api.defaults.baseURL ?? "/", window.location.origin);
+  url.protocol = url.protocol === "https:" ? "wss:" : "ws:";
+  url.pathname = `/api/v1/plans/${plan_id}/events`;
+  return url.toString();
+}
+
+function byRank(a: Task, b: Task) {
+  if (a.rank && b.rank && a.rank !== b.rank) return a.rank < b.rank ? -1 : 1;
+  return a.sort_number - b.sort_number;
+}
+
+// Put a task into its list, replacing any previous copy. Returns undefined when its list is unknown.
+function placeTask(plan: Plan, task: Task): Plan | undefined {
+  if (!plan.task_lists.some((list) => list._id === task.task_list_id)) return undefined;
+  return {
+    ...plan,
+    task_lists: plan.task_lists.map((list) => {
+      const tasks = list.tasks.filter((item) => item._id !== task._id);
+      if (list._id === task.task_list_id) tasks.push(task);
+      return { ...list, tasks: tasks.sort(byRank) };
+    }),
+  };
+}
+
+// Apply a delta to a cached board. Returns undefined when the board must be refetched instead.
+function applyEvent(plan: Plan, event: BoardEvent): Plan | undefined {
+  switch (event.type) {
+    case "task.created":
+    case "task.updated":
+    case "task.moved":
+      return placeTask(plan, event.task);
+    case "task.deleted":
+      return {
+        ...plan,
+        task_lists: plan.task_lists.map((list) => ({
+          ...list,
+          tasks: list.tasks.filter((task) => task._id !== event.task_id),
+        })),
+      };
+    case "tasks.reordered": {
+      const tasks = plan.task_lists.flatMap((list) => list.tasks);
+      let next: Plan | undefined = plan;
+      for (const position of event.tasks) {
+        const task = tasks.find((item) => item._id === position._id);
+        if (!task || !next) return undefined;
+        next = placeTask(next, { ...task, ...position });
+      }
+      return next;
+    }
+    case "task_list.created":
+      return { ...plan, task_lists: [...plan.task_lists, { ...event.task_list, tasks: [] }] };
+    case "task_list.updated":
+      if (!plan.task_lists.some((list) => list._id === event.task_list._id)) return undefined;
+      return {
+        ...plan,
+        task_lists: plan.task_lists.map((list) =>
+          list._id === event.task_list._id ? { ...event.task_list, tasks: list.tasks } : list
+        ),
+      };
+    case "task_list.deleted":
+      return {
+        ...plan,
+        task_lists: plan.task_lists.filter((list) => list._id !== event.task_list_id),
+      };
+    case "plan.updated":
+      return { ...plan, ...event.plan, task_lists: plan.task_lists };
+    default:
+      return undefined;
+  }
+}
+
+// Keep the cached board of a plan in sync with the deltas pushed by the server.
+export function useBoardEvents(plan_id?: string) {
+  const queryclient = useQueryClient();
+
+  useEffect(() => {
+    if (!plan_id) return;
+    const queryKey = ["plans", plan_id, "include_all"];
+    let socket: WebSocket | null = null;
+    let reconnectTimer: ReturnType<typeof setTimeout> | undefined;
+    let closed = false;
+
+    const connect = (reconnecting: boolean) => {
+      socket = new WebSocket(eventsUrl(plan_id));
+      socket.onopen = () => {
+        // Deltas sent while disconnected are lost, so start again from a fresh board.
+        if (reconnecting) queryclient.invalidateQueries({ queryKey });
+      };
+      socket.onmessage = (message) => {
+        const event: BoardEvent = JSON.parse(message.data);
+        const plan = queryclient.getQueryData<Plan>(queryKey);
+        const next = plan && applyEvent(plan, event);
+        if (next) {
+          queryclient.setQueryData(queryKey, next);
+        } else {
+          queryclient.invalidateQueries({ queryKey });
+        }
+      };
+      socket.onclose = () => {
+        if (!closed) reconnectTimer = setTimeout(() => connect(true), RECONNECT_DELAY_MS);
+      };
+    };
+
+    connect(false);
+    return () => {
+      closed = true;
+      clearTimeout(reconnectTimer);
+      socket?.close();
+    };
+  }, [plan_id, queryclient]);
+}
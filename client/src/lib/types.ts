@@ -29,6 +29,7 @@ export interface Task {
   title: string;
   description: string;
   sort_number: number;
+  rank?: string;
   task_list_id: string;
   due_date: Date;
   priority: string;
@@ -21,6 +21,7 @@ import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
 import { TaskListMutationDialog } from "@/components/kanban/TaskListMutationDialog";
 import { toast } from "sonner";
 import { KanbanColumn } from "@/components/kanban/kanbanColumn";
+import { useBoardEvents } from "@/lib/boardEvents";
 
 export default function TaskLists() {
   let { plan_id } = useParams();
@@ -33,6 +34,7 @@ export default function TaskLists() {
     },
     retry: false,
   });
+  useBoardEvents(plan_id);
 
   const [tasks, setTasks] = useState<Task[]>([]);
   const [editTaskList, setEditTaskList] = useState<TaskList | null>(null);
@@ -47,28 +49,35 @@ export default function TaskLists() {
     })
   );
 
-  const sortMutation = useMutation({
-    mutationFn: (
-      data: {
-        id: string;
-        task_list_id: string;
-        sort_number: number;
-      }[]
-    ) =>
+  const moveMutation = useMutation({
+    mutationFn: (data: {
+      id: string;
+      from_task_list_id: string;
+      task_list_id: string;
+      before_id: string | null;
+      after_id: string | null;
+    }) =>
       api
-        .post(`/api/v1/plans/${plan_id}/task-lists/bulk-sorting-update`, {
-          tasks: data,
-        })
+        .post(
+          `/api/v1/plans/${plan_id}/task-lists/${data.from_task_list_id}/tasks/${data.id}/move`,
+          {
+            task_list_id: data.task_list_id,
+            before_id: data.before_id,
+            after_id: data.after_id,
+          }
+        )
         .then((res) => res),
-    onSuccess: async () => {
+    // The task.moved event updates the cached board; a reconnect refetches it (useBoardEvents)
+    onSuccess: () => {
       toast.success("Task sorted successfully");
+    },
+    // Undo the optimistic move by refetching the board
+    onError: async (err: any) => {
+      toast.error(err?.response?.data?.error?.message || "An error occurred");
       await queryclient.invalidateQueries({
         queryKey: ["plans", plan_id, "include_all"],
       });
     },
-    onError: (err: any) => {
-      toast.error(err?.response?.data?.error?.message || "An error occurred");
-    },
   });
 
   function handleDragStart(event: DragStartEvent) {
@@ -123,14 +132,26 @@ export default function TaskLists() {
     );
 
     setTasks(newTasks);
-    // Optionally update backend
-    sortMutation.mutate(
-      newTasks.map((task) => ({
-        id: task._id,
-        task_list_id: task.task_list_id,
-        sort_number: task.sort_number,
-      }))
+
+    // Only the moved task is written: the backend ranks it between its new neighbours
+    const movedTask = newTasks.find((task) => task._id === active.id);
+    if (!movedTask) return;
+    const columnTasks = newTasks.filter(
+      (task) => task.task_list_id === movedTask.task_list_id
+    );
+    const position = columnTasks.findIndex((task) => task._id === movedTask._id);
+    // The path names the list the task is moved from; the local copy already shows it in the new one
+    const fromTaskList = plan?.task_lists?.find((list) =>
+      list.tasks.some((task) => task._id === movedTask._id)
     );
+    if (!fromTaskList) return;
+    moveMutation.mutate({
+      id: movedTask._id,
+      from_task_list_id: fromTaskList._id,
+      task_list_id: movedTask.task_list_id,
+      before_id: columnTasks[position - 1]?._id ?? null,
+      after_id: columnTasks[position + 1]?._id ?? null,
+    });
   }
 
   function handleEditTaskList(taskList: TaskList) {
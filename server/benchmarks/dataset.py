@@ -0,0 +1,195 @@
+"""Synthetic large tenant for the load benchmarks.
+
+Fills a MongoDB database with users, plans, task lists and tasks through unordered bulk
+inserts. Identifiers, titles and timestamps derive from the sizes and a seed, so two runs
+with the same arguments produce the same data. Indexes are left to the app's startup.
+
+    python -m server.benchmarks.dataset --database taskboard_benchmark --plans 1000 --lists 50 --tasks 1000000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from ..core.config import Settings
+from ..core.ranking import rank_from_index
+from ..core.security import pwd_context
+
+PASSWORD = "benchmark-password"
+WORDS = ("alpha", "backlog", "billing", "bug", "cleanup", "deploy", "design", "docs", "export",
+         "feature", "hotfix", "import", "infra", "launch", "login", "metrics", "migration",
+         "mobile", "onboarding", "payments", "perf", "refactor", "release", "report", "review",
+         "search", "security", "signup", "sprint", "sync", "testing", "upgrade")
+
+# Fixed ObjectId timestamp, so identifiers only depend on their kind and index.
+_ID_EPOCH = 1_700_000_000
+_KINDS = {"user": 1, "plan": 2, "task_list": 3, "task": 4}
+_CREATED_AT = datetime(2025, 1, 1)
+
+
+def _object_id(kind: str, index: int) -> ObjectId:
+    return ObjectId(_ID_EPOCH.to_bytes(4, "big") + _KINDS[kind].to_bytes(1, "big") + index.to_bytes(7, "big"))
+
+
+class Tenant:
+    """The layout of a generated tenant: plan j belongs to user j % users and owns task lists
+    j * lists ... (j + 1) * lists - 1; tasks are spread as evenly as possible over all lists.
+    """
+
+    def __init__(self, users: int = 10, plans: int = 1000, lists: int = 50, tasks: int = 1_000_000, seed: int = 42):
+        self.users = users
+        self.plans = plans
+        self.lists = lists
+        self.tasks = tasks
+        self.seed = seed
+        self.task_lists = plans * lists
+        self._tasks_per_list, self._extra_tasks = divmod(tasks, self.task_lists)
+
+    def user_id(self, index: int) -> ObjectId:
+        return _object_id("user", index)
+
+    def email(self, index: int) -> str:
+        return f"user{index}@benchmark.example.com"
+
+    def plan_id(self, index: int) -> ObjectId:
+        return _object_id("plan", index)
+
+    def task_list_id(self, index: int) -> ObjectId:
+        return _object_id("task_list", index)
+
+    def task_ids(self, task_list_index: int) -> list:
+        """Identifiers of the tasks of a task list, in board order."""
+        first = task_list_index * self._tasks_per_list + min(task_list_index, self._extra_tasks)
+        count = self._tasks_per_list + (task_list_index < self._extra_tasks)
+        return [_object_id("task", index) for index in range(first, first + count)]
+
+    def describe(self) -> dict:
+        return {"users": self.users, "plans": self.plans, "task_lists": self.task_lists,
+                "tasks": self.tasks, "seed": self.seed}
+
+    def _rng(self, kind: str) -> random.Random:
+        return random.Random(f"{self.seed}-{kind}")
+
+    def _title(self, rng: random.Random) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(3))
+
+    def user_documents(self):
+        # One hash for everyone: hashing a million times would only benchmark bcrypt.
+        password = pwd_context.hash(PASSWORD)
+        for index in range(self.users):
+            yield {"_id": self.user_id(index), "username": f"user{index}", "email": self.email(index),
+                   "password": password, "full_name": f"Benchmark User {index}",
+                   "created_at": _CREATED_AT, "updated_at": _CREATED_AT}
+
+    def plan_documents(self):
+        rng = self._rng("plans")
+        for index in range(self.plans):
+            at = _CREATED_AT + timedelta(minutes=index)
+            yield {"_id": self.plan_id(index), "title": self._title(rng), "description": self._title(rng),
+                   "user_id": self.user_id(index % self.users), "created_at": at, "updated_at": at}
+
+    def task_list_documents(self):
+        rng = self._rng("task_lists")
+        for index in range(self.task_lists):
+            at = _CREATED_AT + timedelta(seconds=index)
+            yield {"_id": self.task_list_id(index), "title": self._title(rng), "description": "",
+                   "plan_id": self.plan_id(index // self.lists), "created_at": at, "updated_at": at}
+
+    def task_documents(self):
+        rng = self._rng("tasks")
+        for task_list_index in range(self.task_lists):
+            task_list_id = self.task_list_id(task_list_index)
+            for position, task_id in enumerate(self.task_ids(task_list_index)):
+                at = _CREATED_AT + timedelta(seconds=rng.randrange(30 * 24 * 3600))
+                yield {"_id": task_id, "title": self._title(rng), "description": self._title(rng) * 4,
+                       "task_list_id": task_list_id, "due_date": at + timedelta(days=7),
+                       "sort_number": position, "rank": rank_from_index(position),
+                       "priority": rng.choice(("LOW", "MEDIUM", "HIGH")),
+                       "status": rng.choice(("OPEN", "CLOSE")), "created_at": at, "updated_at": at}
+
+
+async def _insert(collection, documents, batch_size: int, concurrency: int) -> int:
+    """Insert `documents` in unordered batches, keeping up to `concurrency` batches in flight."""
+    slots = asyncio.Semaphore(concurrency)
+    pending = set()
+    inserted = 0
+
+    async def insert_batch(batch):
+        try:
+            await collection.insert_many(batch, ordered=False)
+        finally:
+            slots.release()
+
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) == batch_size:
+            await slots.acquire()
+            pending.add(asyncio.create_task(insert_batch(batch)))
+            inserted += len(batch)
+            batch = []
+    if batch:
+        await slots.acquire()
+        pending.add(asyncio.create_task(insert_batch(batch)))
+        inserted += len(batch)
+    await asyncio.gather(*pending)
+    return inserted
+
+
+async def seed(mongo_uri: str, database: str, tenant: Tenant, batch_size: int = 10_000, concurrency: int = 4) -> dict:
+    """Replace `database` with the tenant. Returns the seconds spent per collection."""
+    client = AsyncIOMotorClient(mongo_uri)
+    try:
+        await client.drop_database(database)
+        target = client[database]
+        timings = {}
+        for name, documents in (("users", tenant.user_documents()),
+                                ("plans", tenant.plan_documents()),
+                                ("task_lists", tenant.task_list_documents()),
+                                ("tasks", tenant.task_documents())):
+            start = time.perf_counter()
+            count = await _insert(target[name], documents, batch_size, concurrency)
+            seconds = time.perf_counter() - start
+            timings[name] = {"documents": count, "seconds": round(seconds, 2),
+                             "documents_per_second": round(count / seconds) if seconds else None}
+        return timings
+    finally:
+        client.close()
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--database",
+                        help="database to replace with the tenant (default: <MONGO_DB>_benchmark)")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--plans", type=int, default=1000)
+    parser.add_argument("--lists", type=int, default=50, help="task lists per plan")
+    parser.add_argument("--tasks", type=int, default=1_000_000, help="tasks in total")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+
+
+def tenant_from(args: argparse.Namespace) -> Tenant:
+    return Tenant(users=args.users, plans=args.plans, lists=args.lists, tasks=args.tasks, seed=args.seed)
+
+
+def database_from(args: argparse.Namespace, config: Settings) -> str:
+    return args.database or f"{config.mongo_db}_benchmark"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    args = parser.parse_args()
+    config = Settings()
+
+    database = database_from(args, config)
+    tenant = tenant_from(args)
+    timings = asyncio.run(seed(config.mongo_uri, database, tenant, batch_size=args.batch_size))
+    print(json.dumps({"database": database, "tenant": tenant.describe(), "seed": timings}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
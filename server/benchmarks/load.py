@@ -0,0 +1,204 @@
+"""Load benchmark of the API against a generated large tenant.
+
+Seeds a separate database with the synthetic tenant of server.benchmarks.dataset (a local
+mongod is enough), starts the app in process with its normal lifespan and drives it through
+httpx with concurrent workers, one scenario after the other:
+
+    board          GET a plan with include_all
+    search         GET paginated plans and tasks filtered by a text search
+    bulk_sort      POST bulk-sorting-update reversing the tasks of a list
+    login          POST credentials of a generated user
+    cascade_delete DELETE plans, also timing until their deletion job completes
+
+Prints p50/p95/p99 latency and throughput per scenario as JSON, so releases can be compared
+by running the same arguments against each. Needs httpx.
+
+    python -m server.benchmarks.load --plans 1000 --lists 50 --tasks 1000000 --duration 30 --output before.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import time
+from motor.motor_asyncio import AsyncIOMotorClient
+from ..core.config import Settings
+from .dataset import PASSWORD, WORDS, Tenant, add_arguments, database_from, seed, tenant_from
+
+SCENARIOS = ("board", "search", "bulk_sort", "login", "cascade_delete")
+_JOB_POLL_SECONDS = 0.05
+
+
+def summarize(latencies: list, errors: int, seconds: float) -> dict:
+    """Latency percentiles in milliseconds and throughput of one scenario."""
+    summary = {"requests": len(latencies), "errors": errors, "seconds": round(seconds, 2),
+               "throughput_rps": round(len(latencies) / seconds, 1) if seconds else None}
+    if not latencies:
+        return summary
+    milliseconds = sorted(latency * 1000 for latency in latencies)
+    if len(milliseconds) > 1:
+        cuts = statistics.quantiles(milliseconds, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = milliseconds[0]
+    summary["latency_ms"] = {"p50": round(p50, 2), "p95": round(p95, 2), "p99": round(p99, 2),
+                             "mean": round(statistics.fmean(milliseconds), 2),
+                             "max": round(milliseconds[-1], 2)}
+    return summary
+
+
+class LoadRun:
+    """Scenario requests against one app. Plans at the end of the tenant are reserved for
+    cascade_delete, so the other scenarios never touch a deleted plan.
+    """
+
+    def __init__(self, client, tenant: Tenant, deletes: int):
+        self.client = client
+        self.tenant = tenant
+        self.live_plans = tenant.plans - deletes
+        self.doomed_plans = list(range(self.live_plans, tenant.plans))
+        self.job_latencies = []
+        self._jobs = []
+
+    async def board(self, rng: random.Random):
+        plan_id = self.tenant.plan_id(rng.randrange(self.live_plans))
+        return await self.client.get(f"/api/v1/plans/{plan_id}", params={"include_all": "true"})
+
+    async def search(self, rng: random.Random):
+        if rng.random() < 0.5:
+            return await self.client.get("/api/v1/plans/", params={"limit": 20, "search": rng.choice(WORDS)})
+        plan_index = rng.randrange(self.live_plans)
+        task_list_index = plan_index * self.tenant.lists + rng.randrange(self.tenant.lists)
+        return await self.client.get(
+            f"/api/v1/plans/{self.tenant.plan_id(plan_index)}/task-lists/"
+            f"{self.tenant.task_list_id(task_list_index)}/tasks",
+            params={"limit": 20, "search": rng.choice(WORDS)})
+
+    async def bulk_sort(self, rng: random.Random):
+        plan_index = rng.randrange(self.live_plans)
+        task_list_index = plan_index * self.tenant.lists + rng.randrange(self.tenant.lists)
+        task_list_id = str(self.tenant.task_list_id(task_list_index))
+        task_ids = self.tenant.task_ids(task_list_index)
+        if rng.random() < 0.5:
+            task_ids.reverse()
+        payload = {"tasks": [{"id": str(task_id), "task_list_id": task_list_id, "sort_number": position}
+                             for position, task_id in enumerate(task_ids)]}
+        return await self.client.post(
+            f"/api/v1/plans/{self.tenant.plan_id(plan_index)}/task-lists/bulk-sorting-update", json=payload)
+
+    async def login(self, rng: random.Random):
+        email = self.tenant.email(rng.randrange(self.tenant.users))
+        return await self.client.post("/api/v1/auth/login", json={"email": email, "password": PASSWORD})
+
+    async def cascade_delete(self, rng: random.Random):
+        if not self.doomed_plans:
+            return None
+        plan_id = self.tenant.plan_id(self.doomed_plans.pop())
+        start = time.perf_counter()
+        response = await self.client.delete(f"/api/v1/plans/{plan_id}")
+        if response.is_success:
+            # Followed outside the worker, so the request latency excludes the background removal.
+            self._jobs.append(asyncio.create_task(self._wait_for_job(response.json()["job_id"], start)))
+        return response
+
+    async def _wait_for_job(self, job_id: str, start: float):
+        while True:
+            job = (await self.client.get(f"/api/v1/deletions/{job_id}")).json()
+            if job["status"] == "completed":
+                self.job_latencies.append(time.perf_counter() - start)
+                return
+            if job["status"] == "failed":
+                return
+            await asyncio.sleep(_JOB_POLL_SECONDS)
+
+    async def scenario(self, name: str, concurrency: int, duration: float, seed: int) -> dict:
+        """Run `concurrency` workers issuing `name` requests back to back for `duration` seconds."""
+        operation = getattr(self, name)
+        latencies = []
+        errors = 0
+        deadline = time.perf_counter() + duration
+
+        async def worker(index: int):
+            nonlocal errors
+            rng = random.Random(f"{seed}-{name}-{index}")
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await operation(rng)
+                if response is None:
+                    return
+                latencies.append(time.perf_counter() - start)
+                if response.is_error:
+                    errors += 1
+
+        self.job_latencies, self._jobs = [], []
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(index) for index in range(concurrency)))
+        summary = summarize(latencies, errors, time.perf_counter() - start)
+        if name == "cascade_delete":
+            await asyncio.gather(*self._jobs)
+            summary["job_completion"] = summarize(self.job_latencies, len(self._jobs) - len(self.job_latencies), 0)
+        return summary
+
+
+async def run(args: argparse.Namespace, config: Settings) -> dict:
+    import httpx
+    from ..main import create_app
+
+    tenant = tenant_from(args)
+    if args.deletes >= tenant.plans:
+        raise SystemExit("--deletes must leave at least one plan for the other scenarios")
+
+    results = {"python": platform.python_version(), "database": args.database,
+               "tenant": tenant.describe(), "concurrency": args.concurrency,
+               "duration_seconds": args.duration}
+    if not args.reuse:
+        results["seed"] = await seed(config.mongo_uri, args.database, tenant, batch_size=args.batch_size)
+
+    app = create_app(config.model_copy(update={"mongo_db": args.database}))
+    try:
+        async with app.router.lifespan_context(app):
+            results["startup_ms"] = app.state.startup_timings
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)  # 500s count as errors
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark",
+                                         timeout=None) as client:
+                load = LoadRun(client, tenant, deletes=args.deletes if "cascade_delete" in args.scenarios else 0)
+                results["scenarios"] = {}
+                for name in args.scenarios:
+                    results["scenarios"][name] = await load.scenario(
+                        name, args.concurrency, args.duration, args.seed)
+    finally:
+        if not args.keep:
+            client = AsyncIOMotorClient(config.mongo_uri)
+            await client.drop_database(args.database)
+            client.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16, help="workers per scenario")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per scenario")
+    parser.add_argument("--deletes", type=int, default=20, help="plans reserved for cascade_delete")
+    parser.add_argument("--reuse", action="store_true",
+                        help="run against the tenant left by a previous --keep run instead of seeding")
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark database afterwards")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    args = parser.parse_args()
+    config = Settings()
+    args.database = database_from(args, config)
+    if args.database == config.mongo_db:
+        raise SystemExit("--database must not be the application database, it is dropped and reseeded")
+
+    results = asyncio.run(run(args, config))
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Per-task serialization cost of a plan board.
+
+Compares the validated path (prepare_mongo_document -> *Response models -> response_model
+validation -> JSON) with MongoJSONResponse encoding the projected documents directly.
+
+    python -m server.benchmarks.serialization --tasks 5000 --lists 50
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import Union
+from bson import ObjectId
+from pydantic import TypeAdapter
+from ..core.ranking import rank_from_index
+from ..core.responses import MongoJSONResponse
+from ..schemas.common import prepare_mongo_document
+from ..schemas.plan import PlanResponse, PlanResponseWithTaskLists
+from ..schemas.task_list import TaskListWithTasksResponse
+
+
+def make_board(task_count: int, list_count: int) -> dict:
+    now = datetime.utcnow()
+    plan = {"_id": ObjectId(), "title": "Plan", "description": "Benchmark plan",
+            "user_id": ObjectId(), "created_at": now, "updated_at": now, "task_lists": []}
+    for list_index in range(list_count):
+        task_list = {"_id": ObjectId(), "title": f"List {list_index}", "description": "",
+                     "plan_id": plan["_id"], "created_at": now, "updated_at": now, "tasks": []}
+        for index in range(task_count // list_count):
+            task_list["tasks"].append({
+                "_id": ObjectId(), "title": f"Task {index}", "description": "x" * 200,
+                "task_list_id": task_list["_id"], "due_date": now, "sort_number": index,
+                "rank": rank_from_index(index), "priority": "MEDIUM", "status": "OPEN",
+                "created_at": now, "updated_at": now,
+            })
+        plan["task_lists"].append(task_list)
+    return plan
+
+
+_response_adapter = TypeAdapter(Union[PlanResponseWithTaskLists, PlanResponse])
+
+
+def validated_path(board: dict) -> bytes:
+    task_lists = [TaskListWithTasksResponse(**prepare_mongo_document(task_list))
+                  for task_list in board["task_lists"]]
+    plan = PlanResponseWithTaskLists(**prepare_mongo_document({**board, "task_lists": task_lists}))
+    # What FastAPI does with the returned model for response_model
+    validated = _response_adapter.validate_python(plan, from_attributes=True)
+    return json.dumps(_response_adapter.dump_python(validated, mode="json", by_alias=True)).encode()
+
+
+def fast_path(board: dict) -> bytes:
+    return MongoJSONResponse(board).body
+
+
+def measure(fn, board: dict, repeat: int) -> float:
+    fn(board)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(board)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--lists", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    board = make_board(args.tasks, args.lists)
+    task_count = sum(len(task_list["tasks"]) for task_list in board["task_lists"])
+    results = {}
+    for name, fn in (("validated", validated_path), ("fast", fast_path)):
+        seconds = measure(fn, board, args.repeat)
+        results[name] = {
+            "board_ms": round(seconds * 1000, 3),
+            "per_task_us": round(seconds / task_count * 1_000_000, 3),
+        }
+    results["speedup"] = round(results["validated"]["board_ms"] / results["fast"]["board_ms"], 1)
+    print(json.dumps({"tasks": task_count, "lists": args.lists, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Cold-start time of the API, from interpreter start to the first served request.
+
+Measures the import of server.main in fresh interpreters, then create_app, the lifespan
+warm-up phases and the latency of the first requests against the configured MongoDB.
+Needs httpx for the in-process requests.
+
+    python -m server.benchmarks.startup --imports 5 --requests 20
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+_IMPORT_SNIPPET = "import time; start = time.perf_counter(); import server.main; print(time.perf_counter() - start)"
+_PROBE_PATHS = ("/api/v1/plans/?limit=10", "/api/v1/users/?limit=10")
+
+
+def measure_imports(count: int) -> list:
+    root = Path(__file__).resolve().parents[2]
+    seconds = []
+    for _ in range(count):
+        output = subprocess.run([sys.executable, "-c", _IMPORT_SNIPPET], cwd=root,
+                                capture_output=True, text=True, check=True).stdout
+        seconds.append(float(output.strip().splitlines()[-1]))
+    return seconds
+
+
+async def measure_startup(request_count: int) -> dict:
+    import httpx
+    from ..main import create_app
+
+    start = time.perf_counter()
+    app = create_app()
+    create_app_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        ready_ms = (time.perf_counter() - start) * 1000
+
+        requests = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for path in _PROBE_PATHS:
+                latencies = []
+                for _ in range(request_count + 1):
+                    start = time.perf_counter()
+                    response = await client.get(path)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    response.raise_for_status()
+                requests[path] = {
+                    "first_ms": round(latencies[0], 2),
+                    "median_after_ms": round(statistics.median(latencies[1:]), 2),
+                }
+
+    return {
+        "create_app_ms": round(create_app_ms, 2),
+        "lifespan_ready_ms": round(ready_ms, 2),
+        "phases_ms": app.state.startup_timings,
+        "requests": requests,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--imports", type=int, default=5, help="fresh interpreters to time the import in")
+    parser.add_argument("--requests", type=int, default=20, help="requests per path after the first")
+    args = parser.parse_args()
+
+    imports = measure_imports(args.imports)
+    results = {
+        "import_ms": {
+            "median": round(statistics.median(imports) * 1000, 2),
+            "max": round(max(imports) * 1000, 2),
+        },
+        **asyncio.run(measure_startup(args.requests)),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
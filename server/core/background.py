@@ -0,0 +1,12 @@
+import asyncio
+
+# The event loop only keeps weak references to tasks, so hold on to them until they finish.
+_background_tasks = set()
+
+
+def spawn(coro) -> asyncio.Task:
+    """Run a coroutine in the background of the current event loop."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
@@ -1,4 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Optional
+from pathlib import Path
 
 class Settings(BaseSettings):
     mongo_uri : str
@@ -7,9 +9,42 @@ class Settings(BaseSettings):
     algorithm : str
     access_token_expire_minutes : int
     VITE_BACKEND_APP_API_URL: str
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 0
+    mongo_wait_queue_timeout_ms: Optional[int] = None
+    mongo_server_selection_timeout_ms: int = 30000
+    mongo_connect_timeout_ms: int = 20000
+    mongo_socket_timeout_ms: Optional[int] = None
+    mongo_compressors: str = "zstd,snappy,zlib"
+    verify_indexes: bool = False
+    count_cache_size: int = 10000
+    count_cache_ttl_seconds: float = 30
+    estimated_count_limit: int = 1000
+    principal_cache_size: int = 10000
+    principal_cache_ttl_seconds: float = 60
+    password_hash_workers: int = 4
+    rank_rebalance_length: int = 12
+    deletion_batch_size: int = 500
+    deletion_batch_delay_seconds: float = 0.05
+    # A deletion job whose worker has not renewed its lease for this long is taken over
+    deletion_lease_seconds: float = 60
+    board_cache_size: int = 1000
+    board_cache_ttl_seconds: float = 30
+    event_queue_size: int = 100
+    sync_overlap_seconds: float = 5
+    tombstone_retention_days: int = 30
+    import_batch_size: int = 1000
+    import_max_errors: int = 1000
+    # Longest NDJSON line or CSV record of an import; longer ones are skipped as failed rows
+    import_max_record_bytes: int = 1024 * 1024
+    export_batch_size: int = 1000
+    event_loop_monitor_interval_seconds: float = 0.5
+    # MongoDB commands at least this slow are logged and explained; None turns the log off
+    slow_query_threshold_ms: Optional[float] = 100
+    slow_query_log_size: int = 200
+    slow_query_explain: bool = True
+    # Flag explained queries examining more than this many documents per document returned
+    slow_query_docs_ratio: float = 10
 
-    model_config = SettingsConfigDict(env_file="server/.env")
-
-
-settings = Settings()
-    
\ No newline at end of file
+    # Resolved against the package, not the working directory
+    model_config = SettingsConfigDict(env_file=Path(__file__).resolve().parent.parent / ".env")
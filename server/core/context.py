@@ -0,0 +1,80 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Set
+from .cache import TTLCache
+from .config import Settings
+from ..db.diagnostics import SlowQueryLog
+
+
+class AppContext:
+    """The settings of one app and everything built from them: its MongoDB connection,
+    caches, password hashing pool and board event subscribers. Apps never share any of it,
+    so several can run side by side with different settings. Metrics are the exception: the
+    Prometheus registry, including the connection pool metrics, is process-wide and sums over
+    every app in the process.
+    """
+
+    def __init__(self, config: Settings):
+        self.settings = config
+
+        # Set by db.connect
+        self.client = None
+        self.database = None
+        self.collections: Dict[str, object] = {}
+        # Commands slower than slow_query_threshold_ms, for /api/v1/admin/slow-queries.
+        self.slow_queries = SlowQueryLog()
+
+        # Encoded plan boards, keyed by (plan id, fields). Values are (etag, body) pairs, served
+        # while the etag still matches the plan revision.
+        self.board_cache = TTLCache(maxsize=config.board_cache_size, ttl=config.board_cache_ttl_seconds,
+                                    sizeof=lambda entry: len(entry[1]))
+        # Plan id of each task list, so task writes can tell which board they touch.
+        self.task_list_plans = TTLCache(maxsize=config.board_cache_size * 50,
+                                        ttl=config.board_cache_ttl_seconds)
+        # Exact counts of unfiltered listings, keyed by (collection name, parent id).
+        self.count_cache = TTLCache(maxsize=config.count_cache_size, ttl=config.count_cache_ttl_seconds)
+        # Authenticated users resolved by get_current_user, keyed by user id.
+        self.principal_cache = TTLCache(maxsize=config.principal_cache_size,
+                                        ttl=config.principal_cache_ttl_seconds)
+
+        # bcrypt is CPU bound and takes 100+ ms, so it runs on a dedicated, size-limited pool
+        # instead of blocking the event loop.
+        self.password_executor = ThreadPoolExecutor(
+            max_workers=config.password_hash_workers, thread_name_prefix="password-hash")
+        self.password_queue_depth = 0
+
+        # Subscriber queues of each plan's board, fed by the service layer after every write.
+        # Events only reach subscribers connected to this app.
+        self.subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def close(self):
+        self.password_executor.shutdown(wait=False)
+
+
+_current: ContextVar[AppContext] = ContextVar("app_context")
+
+
+def current() -> AppContext:
+    """The context of the app being served. ContextMiddleware makes it current for each
+    request and the lifespan for startup; tasks spawned from either inherit it.
+    """
+    try:
+        return _current.get()
+    except LookupError:
+        raise RuntimeError("No app context is active") from None
+
+
+def current_settings() -> Settings:
+    return current().settings
+
+
+@contextmanager
+def activate(context: AppContext):
+    """Make `context` current for the duration of the block."""
+    token = _current.set(context)
+    try:
+        yield context
+    finally:
+        _current.reset(token)
@@ -0,0 +1,46 @@
+import asyncio
+from contextlib import contextmanager
+from .context import current
+from .responses import dumps
+
+# Subscriber queues live on the app context, so events only reach viewers of the same app.
+
+RESYNC = dumps({"type": "resync"}).decode()
+
+
+def publish(plan_id, event_type: str, **payload):
+    """Send a board delta to every subscriber of a plan without ever blocking the writer.
+    A subscriber that has fallen `event_queue_size` events behind is told to resync instead.
+    """
+    queues = current().subscribers.get(str(plan_id))
+    if not queues:
+        return
+
+    message = dumps({"type": event_type, "plan_id": str(plan_id), **payload}).decode()
+    for queue in queues:
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC)
+
+
+@contextmanager
+def subscribe(plan_id):
+    """Register a queue receiving the encoded events of a plan for the duration of the block."""
+    plan_id = str(plan_id)
+    context = current()
+    queue = asyncio.Queue(maxsize=context.settings.event_queue_size)
+    context.subscribers.setdefault(plan_id, set()).add(queue)
+    try:
+        yield queue
+    finally:
+        queues = context.subscribers[plan_id]
+        queues.discard(queue)
+        if not queues:
+            del context.subscribers[plan_id]
+
+
+def subscriber_count() -> int:
+    return sum(len(queues) for queues in current().subscribers.values())
@@ -1,12 +1,13 @@
 import jwt 
 from fastapi import HTTPException
 from datetime import datetime, timedelta, timezone
-from ..core.config import settings
+from ..core.context import current_settings
 
 def create_access_token(data : dict) -> str:
     """Create a JWT access token with an expiration time.
      data : dict -> JWT payload
     """
+    settings = current_settings()
     to_encode = data.copy()   # copy access token payload
     expire = datetime.now(timezone.utc) + \
         timedelta(minutes=int(settings.access_token_expire_minutes))
@@ -18,6 +19,7 @@ def create_access_token(data : dict) -> str:
 
 def decode_token(token : str):
     """Decode a JWT token and return the payload."""
+    settings = current_settings()
     try:
         return jwt.decode(jwt=token, key=settings.secret_key, algorithms=[settings.algorithm])
     except jwt.PyJWTError:
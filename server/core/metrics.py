@@ -0,0 +1,182 @@
+import asyncio
+import time
+from bisect import bisect_left
+from threading import Lock
+from typing import Callable, Dict, Sequence, Tuple
+
+
+# Upper bounds, in seconds, suited to request and database latencies.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram:
+    """Counts observations into fixed buckets; recording is one bisect and a few additions."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> dict:
+        """Cumulative bucket counts keyed by upper bound, as in the Prometheus exposition format."""
+        with self._lock:
+            counts = list(self.counts)
+            total, count = self.sum, self.count
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        return {"count": count, "sum": total, "buckets": buckets}
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = Lock()
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+
+class Family:
+    """A named metric with one child per combination of label values."""
+
+    def __init__(self, name: str, help: str, kind: str, labelnames: Tuple[str, ...], factory: Callable):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = labelnames
+        self._factory = factory
+        self._children: Dict[tuple, object] = {}
+        self._lock = Lock()
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._factory())
+        return child
+
+    def children(self) -> list:
+        return list(self._children.items())
+
+
+class CallbackFamily:
+    """A metric read from `collect` at scrape time: a number, or a dict of label values -> number."""
+
+    def __init__(self, name: str, help: str, kind: str, labelnames: Tuple[str, ...], collect: Callable):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = labelnames
+        self._collect = collect
+
+    def children(self) -> list:
+        values = self._collect()
+        if not isinstance(values, dict):
+            return [((), _Value(values))]
+        return [(labels if isinstance(labels, tuple) else (labels,), _Value(value))
+                for labels, value in values.items()]
+
+
+class _Value:
+    def __init__(self, value: float):
+        self.value = value
+
+
+_registry: Dict[str, object] = {}
+
+
+def _register(family):
+    if family.name in _registry:
+        raise ValueError(f"Metric {family.name} is already registered")
+    _registry[family.name] = family
+    return family
+
+
+def histogram(name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Family:
+    return _register(Family(name, help, "histogram", labelnames, lambda: Histogram(buckets)))
+
+
+def counter(name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Family:
+    return _register(Family(name, help, "counter", labelnames, Counter))
+
+
+def gauge(name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Family:
+    return _register(Family(name, help, "gauge", labelnames, Gauge))
+
+
+def callback(name: str, help: str, collect: Callable, labelnames: Tuple[str, ...] = (), kind: str = "gauge") -> CallbackFamily:
+    """Register a counter or gauge whose values are kept elsewhere and read on each scrape."""
+    return _register(CallbackFamily(name, help, kind, labelnames, collect))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for family in list(_registry.values()):
+        lines.append(f"# HELP {family.name} {family.help}")
+        lines.append(f"# TYPE {family.name} {family.kind}")
+        for values, child in family.children():
+            if family.kind != "histogram":
+                lines.append(f"{family.name}{_labels(family.labelnames, values)} {child.value}")
+                continue
+            snapshot = child.snapshot()
+            for bound, count in snapshot["buckets"].items():
+                labels = _labels((*family.labelnames, "le"), (*values, bound))
+                lines.append(f"{family.name}_bucket{labels} {count}")
+            labels = _labels(family.labelnames, values)
+            lines.append(f"{family.name}_sum{labels} {snapshot['sum']}")
+            lines.append(f"{family.name}_count{labels} {snapshot['count']}")
+    return "\n".join(lines) + "\n"
+
+
+event_loop_lag_seconds = histogram(
+    "event_loop_lag_seconds", "Delay of a timer on the event loop past its deadline",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5))
+
+
+async def monitor_event_loop(interval: float = 0.5):
+    """Sleep `interval` over and over, recording how late the loop wakes up."""
+    lag = event_loop_lag_seconds.labels()
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag.observe(max(0.0, time.perf_counter() - start - interval))
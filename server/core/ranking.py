@@ -0,0 +1,39 @@
+from typing import Optional
+
+# Rank keys are base-62 strings compared lexicographically. A key never ends in the
+# lowest digit, so there is always room to insert another key before it.
+_DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+_BASE = len(_DIGITS)
+
+RANK_WIDTH = 6
+RANK_STEP = _BASE ** 2
+
+
+def rank_from_index(index: int) -> str:
+    """Evenly spaced, fixed-width rank key for the task at `index` of a list."""
+    value = index * RANK_STEP + RANK_STEP // 2 + _BASE // 2
+    key = ""
+    while value:
+        value, digit = divmod(value, _BASE)
+        key = _DIGITS[digit] + key
+    return key.rjust(RANK_WIDTH, _DIGITS[0])
+
+
+def rank_between(before: Optional[str] = None, after: Optional[str] = None) -> str:
+    """Rank key sorting strictly between `before` and `after`; None means unbounded."""
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"Rank {before!r} must sort before {after!r}")
+
+    before = before or ""
+    bounded = after is not None
+    key = ""
+    i = 0
+    while True:
+        low = _DIGITS.index(before[i]) if i < len(before) else 0
+        high = _DIGITS.index(after[i]) if bounded and i < len(after) else _BASE
+        if high - low > 1:
+            return key + _DIGITS[(low + high) // 2]
+        key += _DIGITS[low]
+        if low < high:
+            bounded = False
+        i += 1
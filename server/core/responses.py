@@ -0,0 +1,44 @@
+import json
+from typing import Optional
+from datetime import datetime
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard library encoder
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches `etag`, using weak comparison."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in tags)
+
+
+class MongoJSONResponse(JSONResponse):
+    """Encode trusted, projected Mongo documents directly.
+    ObjectIds become strings on the way out; nothing is converted or validated beforehand,
+    so routes returning it skip both prepare_mongo_document and response_model validation.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
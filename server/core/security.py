@@ -1,11 +1,35 @@
+import asyncio
+from typing import Optional, Tuple
 from passlib.context import CryptContext
+from .context import current
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def _run_password_work(fn, *args):
+    """Run bcrypt on the app's size-limited password pool instead of the event loop."""
+    context = current()
+    context.password_queue_depth += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(context.password_executor, fn, *args)
+    finally:
+        context.password_queue_depth -= 1
 
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
\ No newline at end of file
+def password_queue_depth() -> int:
+    """Number of hash/verify calls currently running or waiting for a worker."""
+    return current().password_queue_depth
+
+
+async def warm_up():
+    """Load the bcrypt backend and start a hashing worker ahead of the first login."""
+    await _run_password_work(pwd_context.dummy_verify)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a replacement hash when the stored one uses outdated settings."""
+    return await _run_password_work(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+async def get_password_hash(password: str) -> str:
+    return await _run_password_work(pwd_context.hash, password)
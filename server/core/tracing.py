@@ -0,0 +1,28 @@
+import functools
+import inspect
+from contextvars import ContextVar
+from typing import Optional
+
+# The service method a coroutine is running in, e.g. "TaskListService.group_tasks_by_task_list".
+# Motor copies the context into its executor threads, so pymongo listeners can read it too.
+current_operation: ContextVar[Optional[str]] = ContextVar("current_operation", default=None)
+
+
+def _trace(operation: str, fn):
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        token = current_operation.set(operation)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            current_operation.reset(token)
+    return wrapper
+
+
+def traced(cls):
+    """Class decorator naming the current operation after each async static method while it runs."""
+    for name, attribute in list(vars(cls).items()):
+        fn = attribute.__func__ if isinstance(attribute, staticmethod) else attribute
+        if inspect.iscoroutinefunction(fn):
+            setattr(cls, name, staticmethod(_trace(f"{cls.__name__}.{name}", fn)))
+    return cls
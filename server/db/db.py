@@ -1,9 +1,153 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from ..core.config import settings
-
-client = AsyncIOMotorClient(settings.mongo_uri)
-db = client[settings.mongo_db]
-user_collection = db.get_collection("users")
-plan_collection = db.get_collection("plans")
-task_list_collection = db.get_collection("task_lists")
-task_collection = db.get_collection("tasks") 
\ No newline at end of file
+from pymongo import monitoring
+from ..core import metrics
+from ..core.tracing import current_operation
+from ..core.context import AppContext, current
+from .diagnostics import SlowQueryLog
+import importlib.util
+
+# Modules pymongo needs for each wire compressor; zlib ships with Python.
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+pool_checkout_seconds = metrics.histogram(
+    "mongodb_pool_checkout_seconds", "Time spent waiting for a pooled MongoDB connection").labels()
+pool_checkout_failures = metrics.counter(
+    "mongodb_pool_checkout_failures_total", "Failed MongoDB connection checkouts").labels()
+command_seconds = metrics.histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round trip time",
+    labelnames=("collection", "command"))
+command_failures = metrics.counter(
+    "mongodb_command_failures_total", "MongoDB commands that returned an error",
+    labelnames=("collection", "command"))
+
+
+class _PoolListener(monitoring.ConnectionPoolListener):
+    def connection_checked_out(self, event):
+        pool_checkout_seconds.observe(event.duration)
+
+    def connection_check_out_failed(self, event):
+        pool_checkout_failures.inc()
+        pool_checkout_seconds.observe(event.duration)
+
+    # The remaining pool events are not recorded.
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_created(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+    def connection_check_out_started(self, event): pass
+    def connection_checked_in(self, event): pass
+
+
+class _CommandListener(monitoring.CommandListener):
+    """Times every command by collection and command name, and hands slow ones to `slow_queries`."""
+
+    def __init__(self, slow_queries: SlowQueryLog):
+        self.slow_queries = slow_queries
+        # Collection, service operation and command of each in-flight command;
+        # only the started event carries them.
+        self._started = {}
+
+    def started(self, event):
+        target = event.command.get("collection") if event.command_name == "getMore" \
+            else event.command.get(event.command_name)
+        self._started[event.request_id] = (target if isinstance(target, str) else "",
+                                           current_operation.get(), event.database_name, event.command)
+
+    def succeeded(self, event):
+        collection, operation, database, command = self._started.pop(event.request_id, ("", None, "", {}))
+        command_seconds.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+        duration_ms = event.duration_micros / 1000
+        # Explains are timed like any command but never logged, or they would explain themselves.
+        if self.slow_queries.is_slow(duration_ms) and event.command_name != "explain":
+            self.slow_queries.record(operation, database, collection, event.command_name, command, duration_ms)
+
+    def failed(self, event):
+        collection = self._started.pop(event.request_id, ("",))[0]
+        command_seconds.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+        command_failures.labels(collection, event.command_name).inc()
+
+
+class _Collection:
+    """A named collection of the current app's database, resolved on every use."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attr):
+        target = current().collections.get(self.name)
+        if target is None:
+            raise RuntimeError(f"MongoDB is not connected; cannot use collection {self.name!r}")
+        return getattr(target, attr)
+
+
+user_collection = _Collection("users")
+plan_collection = _Collection("plans")
+task_list_collection = _Collection("task_lists")
+task_collection = _Collection("tasks")
+counter_collection = _Collection("counters")
+deletion_job_collection = _Collection("deletion_jobs")
+tombstone_collection = _Collection("tombstones")
+migration_collection = _Collection("migrations")
+_collections = (user_collection, plan_collection, task_list_collection, task_collection,
+                counter_collection, deletion_job_collection, tombstone_collection, migration_collection)
+
+
+def available_compressors(names: str) -> list:
+    """The configured wire compressors whose libraries are installed, in order of preference."""
+    return [name for name in (name.strip() for name in names.split(","))
+            if name in _COMPRESSOR_MODULES and importlib.util.find_spec(_COMPRESSOR_MODULES[name])]
+
+
+def connect(context: AppContext) -> AsyncIOMotorClient:
+    """Create the Motor client of an app and bind its collections to the configured database."""
+    config = context.settings
+    options = {
+        "maxPoolSize": config.mongo_max_pool_size,
+        "minPoolSize": config.mongo_min_pool_size,
+        "waitQueueTimeoutMS": config.mongo_wait_queue_timeout_ms,
+        "serverSelectionTimeoutMS": config.mongo_server_selection_timeout_ms,
+        "connectTimeoutMS": config.mongo_connect_timeout_ms,
+        "socketTimeoutMS": config.mongo_socket_timeout_ms,
+        "event_listeners": [_PoolListener(), _CommandListener(context.slow_queries)],
+    }
+    compressors = available_compressors(config.mongo_compressors)
+    if compressors:
+        options["compressors"] = compressors
+
+    client = AsyncIOMotorClient(config.mongo_uri, **options)
+    context.client = client
+    context.database = client[config.mongo_db]
+    context.slow_queries.configure(client, config.slow_query_threshold_ms, config.slow_query_log_size,
+                                   config.slow_query_explain, config.slow_query_docs_ratio)
+    context.collections = {collection.name: context.database.get_collection(collection.name)
+                           for collection in _collections}
+    return client
+
+
+async def warm_up():
+    """Reach the server once so the first request does not pay for server selection and handshakes."""
+    await current().client.admin.command("ping")
+
+
+def get_database():
+    database = current().database
+    if database is None:
+        raise RuntimeError("MongoDB is not connected")
+    return database
+
+
+def close(context: AppContext):
+    if context.client is not None:
+        context.client.close()
+    context.client = context.database = None
+    context.collections = {}
+
+
+def pool_stats() -> dict:
+    return {
+        "checkout_seconds": pool_checkout_seconds.snapshot(),
+        "checkout_failures": int(pool_checkout_failures.value),
+    }
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Optional
+from ..core.background import spawn
+from ..core.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Command fields holding the query shape, by command name.
+_SHAPE_FIELDS = {
+    "find": ("filter", "sort"),
+    "aggregate": ("pipeline",),
+    "count": ("query",),
+    "distinct": ("key", "query"),
+    "findAndModify": ("query", "sort"),
+}
+# Read commands that can be explained without side effects.
+_EXPLAINABLE = {"find", "aggregate", "count", "distinct"}
+# Session and transport fields explain does not accept.
+_SESSION_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "signature"}
+
+
+def plan_stages(plan: dict):
+    """Every stage name of an explained plan tree."""
+    yield plan.get("stage")
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from plan_stages(child)
+
+
+def query_shape(value):
+    """`value` with every literal replaced by its type name. Keys, operators and $field paths are kept."""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            return [query_shape(item) for item in value]
+        return [f"{len(value)} values"]
+    if isinstance(value, str) and value.startswith("$"):
+        return value
+    return type(value).__name__
+
+
+def command_shape(command_name: str, command: dict) -> dict:
+    if command_name in ("update", "delete"):
+        statements = command.get(command_name + "s") or []
+        return {"filter": query_shape(statements[0].get("q", {})) if statements else {},
+                "statements": len(statements)}
+    shape = {}
+    for field in _SHAPE_FIELDS.get(command_name, ()):
+        if field in command:
+            # Sort directions are not data, so they are kept as they are.
+            shape[field] = dict(command[field]) if field == "sort" else query_shape(command[field])
+    return shape
+
+
+def _explainable(command_name: str, command: dict) -> bool:
+    if command_name not in _EXPLAINABLE:
+        return False
+    # Explaining with executionStats runs the pipeline, which must not write.
+    return not any("$out" in stage or "$merge" in stage for stage in command.get("pipeline", ()))
+
+
+def _execution(explain: dict) -> Optional[dict]:
+    """The part of an explain output holding queryPlanner and executionStats."""
+    if "queryPlanner" in explain:
+        return explain
+    for stage in explain.get("stages", ()):
+        if "$cursor" in stage:
+            return stage["$cursor"]
+    return None
+
+
+class SlowQueryLog:
+    """Keeps the latest MongoDB commands slower than a threshold and explains them in the background.
+
+    `record` is called from pymongo's listener threads; explains run on the event loop
+    that connected the client and are shared by commands with the same shape for a minute.
+    """
+
+    def __init__(self):
+        self.threshold_ms = None
+        self.docs_ratio = 10.0
+        self.entries = deque(maxlen=200)
+        self._explain = False
+        self._client = None
+        self._loop = None
+        self._explained = TTLCache(maxsize=256, ttl=60)
+
+    def configure(self, client, threshold_ms: Optional[float], size: int, explain: bool, docs_ratio: float):
+        self.threshold_ms = threshold_ms
+        self.docs_ratio = docs_ratio
+        self.entries = deque(maxlen=size)
+        self._explain = explain
+        self._client = client
+        self._explained.clear()
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+
+    def is_slow(self, duration_ms: float) -> bool:
+        return self.threshold_ms is not None and duration_ms >= self.threshold_ms
+
+    def record(self, operation: Optional[str], database: str, collection: str, command_name: str,
+               command: dict, duration_ms: float):
+        entry = {
+            "at": datetime.utcnow(),
+            "operation": operation,
+            "collection": collection,
+            "command": command_name,
+            "duration_ms": round(duration_ms, 3),
+            "shape": command_shape(command_name, command),
+            "explain": None,
+        }
+        self.entries.append(entry)
+        logger.warning("Slow MongoDB %s on %s from %s took %.1f ms: %s", command_name, collection,
+                       operation, duration_ms, entry["shape"])
+
+        if self._explain and self._loop is not None and _explainable(command_name, command):
+            explain_command = {key: value for key, value in command.items()
+                               if key not in _SESSION_FIELDS and not key.startswith("$")}
+            try:
+                self._loop.call_soon_threadsafe(self._schedule, entry, database, explain_command)
+            except RuntimeError:
+                # The loop has been closed.
+                pass
+
+    def _schedule(self, entry: dict, database: str, command: dict):
+        key = (database, entry["collection"], entry["command"], json.dumps(entry["shape"], default=str))
+        result = self._explained.get(key)
+        if result is None:
+            result = {"status": "pending"}
+            self._explained.set(key, result)
+            spawn(self._run_explain(result, database, command))
+        entry["explain"] = result
+
+    async def _run_explain(self, result: dict, database: str, command: dict):
+        """Fill `result` in place, so every entry sharing it sees the outcome."""
+        try:
+            explain = await self._client[database].command(
+                {"explain": command, "verbosity": "executionStats"})
+        except Exception as error:
+            result.update(status="failed", error=str(error))
+            return
+
+        execution = _execution(explain)
+        if execution is None:
+            result.update(status="unsupported")
+            return
+        stats = execution.get("executionStats", {})
+        stages = [stage for stage in plan_stages(execution["queryPlanner"]["winningPlan"]) if stage]
+        examined = stats.get("totalDocsExamined", 0)
+        returned = stats.get("nReturned", 0)
+        ratio = examined / max(returned, 1)
+
+        flags = []
+        if "COLLSCAN" in stages:
+            flags.append("COLLSCAN")
+        if ratio > self.docs_ratio:
+            flags.append("HIGH_DOCS_EXAMINED_RATIO")
+        result.update(status="done", stages=stages, flags=flags, docs_examined=examined,
+                      keys_examined=stats.get("totalKeysExamined", 0), returned=returned,
+                      docs_examined_ratio=round(ratio, 2))
+
+    def recent(self, limit: int = 50) -> list:
+        """The newest entries first."""
+        entries = list(self.entries)
+        entries.reverse()
+        return entries[:limit]
@@ -0,0 +1,41 @@
+from typing import Optional
+from fastapi import HTTPException
+from ..schemas.common import response_projection
+
+
+def sparse_projections(fields: Optional[str], levels: dict) -> dict:
+    """Turn a ?fields=title,tasks.status parameter into one Mongo projection per nesting level.
+    `levels` maps a prefix ("" for the top level) to (response model, link field); the link
+    field is always kept so nested documents can still be grouped under their parent.
+    Levels without requested fields keep the full projection of their response model.
+    """
+    requested = {prefix: set() for prefix in levels}
+    for field in (fields or "").split(","):
+        field = field.strip()
+        if not field:
+            continue
+        prefix, _, name = field.rpartition(".")
+        if prefix not in requested:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {field}")
+        requested[prefix].add(name)
+
+    projections = {}
+    for prefix, (model, link_field) in levels.items():
+        full_projection = response_projection(model)
+        if not requested[prefix]:
+            projections[prefix] = full_projection
+            continue
+
+        projection = {"_id": 1}
+        for name in requested[prefix]:
+            field = model.model_fields.get(name)
+            key = (field.alias or name) if field else name
+            if key not in full_projection:
+                raise HTTPException(
+                    status_code=400, detail=f"Unknown field: {prefix + '.' if prefix else ''}{name}")
+            projection[key] = 1
+        if link_field:
+            projection[link_field] = 1
+        projections[prefix] = projection
+
+    return projections
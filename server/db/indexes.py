@@ -0,0 +1,155 @@
+import argparse
+import asyncio
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from . import db
+from .diagnostics import plan_stages
+from ..core.config import Settings
+from ..core.context import AppContext, activate, current
+from .pagination import PAGE_SORT
+
+
+# Indexes backing the query shapes used by the services.
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="created_at_id"),
+        IndexModel([("username", TEXT), ("email", TEXT)], name="search",
+                   weights={"username": 2, "email": 1}),
+    ],
+    "plans": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="user_id_created_at_id"),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="created_at_id"),
+        IndexModel([("title", TEXT)], name="search"),
+    ],
+    "task_lists": [
+        IndexModel([("plan_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="plan_id_created_at_id"),
+        IndexModel([("plan_id", ASCENDING), ("updated_at", ASCENDING)],
+                   name="plan_id_updated_at"),
+        IndexModel([("plan_id", ASCENDING), ("title", TEXT)], name="search"),
+    ],
+    "tasks": [
+        IndexModel([("task_list_id", ASCENDING), ("sort_number", ASCENDING)],
+                   name="task_list_id_sort_number"),
+        IndexModel([("task_list_id", ASCENDING), ("rank", ASCENDING), ("sort_number", ASCENDING)],
+                   name="task_list_id_rank"),
+        IndexModel([("task_list_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="task_list_id_created_at_id"),
+        IndexModel([("task_list_id", ASCENDING), ("updated_at", ASCENDING)],
+                   name="task_list_id_updated_at"),
+        IndexModel([("task_list_id", ASCENDING), ("title", TEXT)], name="search"),
+    ],
+    "deletion_jobs": [
+        IndexModel([("status", ASCENDING)], name="status"),
+    ],
+    "tombstones": [
+        IndexModel([("plan_id", ASCENDING), ("deleted_at", ASCENDING)],
+                   name="plan_id_deleted_at"),
+    ],
+}
+
+
+def _configured_indexes(config: Settings) -> dict:
+    """INDEXES plus the indexes whose options come from the settings."""
+    return {**INDEXES, "tombstones": [
+        *INDEXES["tombstones"],
+        IndexModel([("deleted_at", ASCENDING)], name="deleted_at_ttl",
+                   expireAfterSeconds=config.tombstone_retention_days * 24 * 3600),
+    ]}
+
+
+# Representative (collection name, filter, sort) of every service query, used by the check mode.
+_sample_id = ObjectId()
+_sample_time = datetime(2024, 1, 1)
+QUERY_SHAPES = [
+    ("UserService.find_all", "users", {}, PAGE_SORT),
+    ("UserService.find_all (search)", "users",
+     {"$text": {"$search": "user"}}, None),
+    ("UserService.find_with_pass_by_email", "users",
+     {"email": {"$in": ["User@example.com", "user@example.com"]}}, None),
+    ("PlanService.find_all", "plans", {}, PAGE_SORT),
+    ("PlanService.find_all (search)", "plans",
+     {"$text": {"$search": "plan"}}, None),
+    ("TaskListService.find_all_with_pagination", "task_lists",
+     {"plan_id": _sample_id}, PAGE_SORT),
+    ("TaskListService.find_all_with_pagination (search)", "task_lists",
+     {"plan_id": _sample_id, "$text": {"$search": "list"}}, None),
+    ("TaskListService.group_task_lists_by_plan", "task_lists",
+     {"plan_id": {"$in": [_sample_id]}}, None),
+    ("DeletionService._delete_task_lists", "task_lists",
+     {"plan_id": _sample_id}, None),
+    ("DeletionService._delete_tasks", "tasks",
+     {"task_list_id": {"$in": [_sample_id]}}, None),
+    ("DeletionService.resume_pending", "deletion_jobs",
+     {"status": {"$in": ["pending", "running"]},
+      "$or": [{"lease_until": {"$lt": _sample_time}}, {"lease_until": None}]}, None),
+    ("TaskService.find_all", "tasks",
+     {"task_list_id": _sample_id}, PAGE_SORT),
+    ("TaskService.find_all (search)", "tasks",
+     {"task_list_id": _sample_id, "$text": {"$search": "task"}}, None),
+    ("SequenceService._seed", "tasks",
+     {"task_list_id": _sample_id}, [("sort_number", -1)]),
+    ("TaskListService.group_tasks_by_task_list", "tasks",
+     {"task_list_id": {"$in": [_sample_id]}}, [("rank", 1), ("sort_number", 1)]),
+    ("SyncService.changes (task lists)", "task_lists",
+     {"plan_id": _sample_id, "updated_at": {"$gte": _sample_time}}, None),
+    ("SyncService.changes (tasks)", "tasks",
+     {"task_list_id": {"$in": [_sample_id]}, "updated_at": {"$gte": _sample_time}}, None),
+    ("SyncService.changes (tombstones)", "tombstones",
+     {"plan_id": _sample_id, "deleted_at": {"$gte": _sample_time}}, [("deleted_at", 1)]),
+    ("ExportService.export_user", "plans",
+     {"user_id": _sample_id}, [("created_at", 1), ("_id", 1)]),
+    ("ExportService._plans (task lists)", "task_lists",
+     {"plan_id": _sample_id}, [("created_at", 1), ("_id", 1)]),
+    ("ExportService._plans (tasks)", "tasks",
+     {"task_list_id": {"$in": [_sample_id]}}, [("task_list_id", 1), ("rank", 1), ("sort_number", 1)]),
+    ("TaskService.move", "tasks",
+     {"task_list_id": _sample_id, "rank": {"$gt": "V"}}, [("rank", 1)]),
+]
+
+
+async def ensure_indexes():
+    """Create every registered index. Safe to run on each startup."""
+    for collection_name, indexes in _configured_indexes(current().settings).items():
+        await db.get_database().get_collection(collection_name).create_indexes(indexes)
+
+
+async def check_indexes():
+    """Explain every registered query shape and fail if any winning plan is a COLLSCAN."""
+    collscans = []
+    for name, collection_name, query, sort in QUERY_SHAPES:
+        cursor = db.get_database().get_collection(collection_name).find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        winning_plan = explain["queryPlanner"]["winningPlan"]
+        if "COLLSCAN" in plan_stages(winning_plan):
+            collscans.append(f"{name} on {collection_name}")
+
+    if collscans:
+        raise RuntimeError("Queries without index support: " + ", ".join(collscans))
+
+
+async def main(check: bool = False):
+    context = AppContext(Settings())
+    with activate(context):
+        db.connect(context)
+        try:
+            await ensure_indexes()
+            if check:
+                await check_indexes()
+        finally:
+            db.close(context)
+            context.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create and verify MongoDB indexes")
+    parser.add_argument("--check", action="store_true",
+                        help="explain every service query and fail on COLLSCAN")
+    asyncio.run(main(check=parser.parse_args().check))
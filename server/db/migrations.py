@@ -0,0 +1,39 @@
+import logging
+from datetime import datetime
+from pymongo.errors import DuplicateKeyError
+from .db import migration_collection, user_collection
+
+logger = logging.getLogger(__name__)
+
+
+async def lowercase_emails():
+    """Store every email in lowercase, the form accounts are created and updated with.
+    An account whose lowercase email already belongs to another one is left as it is.
+    """
+    async for user in user_collection.find({}, {"email": 1}):
+        email = user.get("email")
+        if not email or email == email.lower():
+            continue
+        try:
+            await user_collection.update_one({"_id": user["_id"]}, {"$set": {"email": email.lower()}})
+        except DuplicateKeyError:
+            logger.warning("Email of user %s differs only in case from another account; left as stored",
+                           user["_id"])
+
+
+# Applied in order, once per database. Each one is idempotent, so workers starting together
+# may both run it before it is recorded.
+MIGRATIONS = [
+    ("lowercase_emails", lowercase_emails),
+]
+
+
+async def migrate():
+    applied = {migration["_id"] async for migration in migration_collection.find({}, {"_id": 1})}
+    for name, migration in MIGRATIONS:
+        if name in applied:
+            continue
+        logger.info("Applying migration %s", name)
+        await migration()
+        await migration_collection.update_one(
+            {"_id": name}, {"$setOnInsert": {"applied_at": datetime.utcnow()}}, upsert=True)
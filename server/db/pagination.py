@@ -0,0 +1,112 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+from bson import ObjectId
+from fastapi import HTTPException
+from ..core.context import current
+from ..schemas.common import CountMode
+from .search import TEXT_SCORE
+
+
+# Every paginated listing is ordered newest first, with _id breaking created_at ties.
+PAGE_SORT = [("created_at", -1), ("_id", -1)]
+
+
+def encode_cursor(doc: dict) -> str:
+    """Encode the (created_at, _id) position of a document as an opaque cursor."""
+    created_at = doc.get("created_at")
+    payload = {
+        "created_at": created_at.isoformat() if created_at else None,
+        "_id": str(doc["_id"]),
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Turn an opaque cursor into a filter matching the documents that come after it."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        created_at = datetime.fromisoformat(
+            payload["created_at"]) if payload["created_at"] else None
+        last_id = ObjectId(payload["_id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    return {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": last_id}},
+    ]}
+
+
+async def find_page(collection, query: dict, limit: int, skip: int = 0, cursor: Optional[str] = None, ranked: bool = False, projection: Optional[dict] = None):
+    """Fetch one page of documents and the cursor of the next page.
+    With a cursor the page is located through the (created_at, _id) index instead of skip.
+    `ranked` orders $text matches by relevance; a relevance order has no keyset, so ranked
+    pages are reached with skip and never return a cursor.
+    A sparse `projection` still fetches the created_at and _id the cursor is built from; the
+    ones it left out are removed from the page.
+    """
+    sort = PAGE_SORT
+    hidden = []
+    if projection and not ranked:
+        if "created_at" not in projection:
+            hidden.append("created_at")
+        if projection.get("_id", 1) == 0:
+            hidden.append("_id")
+        projection = {**projection, **{key: 1 for key in hidden}}
+    if ranked:
+        if cursor:
+            raise HTTPException(
+                status_code=400, detail="Search results are paged with skip, not a cursor")
+        projection = {**(projection or {}), "score": TEXT_SCORE}
+        sort = [("score", TEXT_SCORE), *PAGE_SORT]
+    elif cursor:
+        query = {**query, **decode_cursor(cursor)}
+        skip = 0
+
+    docs = await collection.find(query, projection).sort(sort).skip(
+        skip).limit(limit + 1).to_list(length=None)
+    if ranked:
+        for doc in docs:
+            doc.pop("score", None)
+
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit and not ranked else None
+    docs = docs[:limit]
+    for doc in docs:
+        for key in hidden:
+            doc.pop(key, None)
+    return docs, next_cursor
+
+
+async def count_documents(collection, query: dict, count_mode: CountMode = CountMode.exact, cache_key: Optional[tuple] = None) -> Optional[int]:
+    """Count the documents of a listing according to `count_mode`.
+    Exact counts are cached under `cache_key` when one is given.
+    """
+    if count_mode == CountMode.none:
+        return None
+
+    if count_mode == CountMode.estimated:
+        if not query:
+            return await collection.estimated_document_count()
+        return await collection.count_documents(query, limit=current().settings.estimated_count_limit)
+
+    if cache_key is None:
+        return await collection.count_documents(query)
+
+    count_cache = current().count_cache
+    total_count = count_cache.get(cache_key)
+    if total_count is None:
+        total_count = await collection.count_documents(query)
+        count_cache.set(cache_key, total_count)
+    return total_count
+
+
+def invalidate_count(collection_name: str, parent_id=None):
+    """Drop the cached counts of a collection for one parent, or for every parent."""
+    count_cache = current().count_cache
+    if parent_id is None:
+        count_cache.invalidate_where(lambda key: key[0] == collection_name)
+    else:
+        count_cache.invalidate((collection_name, str(parent_id)))
+        count_cache.invalidate((collection_name, None))
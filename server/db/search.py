@@ -0,0 +1,25 @@
+from typing import Optional
+
+
+TEXT_SCORE = {"$meta": "textScore"}
+
+
+def text_search(search: str) -> Optional[dict]:
+    """Build a $text filter from free user input.
+    Quotes and leading minus signs are stripped so the input cannot form phrase or
+    negation operators. Returns None when nothing searchable is left.
+    """
+    terms = [term.lstrip("-") for term in search.replace('"', " ").split()]
+    terms = [term for term in terms if term]
+    if not terms:
+        return None
+    return {"$search": " ".join(terms)}
+
+
+def email_filter(email: str) -> dict:
+    """Match an email exactly, as stored or in its normalized lowercase form.
+    The lowercase_emails migration stores every email in lowercase, so the lowercase form
+    finds any account with the address; the form as given finds the accounts it left as stored.
+    Unlike a case-insensitive regex, an $in of equalities is served by the email index.
+    """
+    return {"$in": list({email, email.lower()})}
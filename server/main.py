@@ -3,51 +3,175 @@ from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.exceptions import RequestValidationError
 from starlette.middleware.cors import CORSMiddleware
-from .routes import user , auth , task_list , task , plan 
-from .core import exception_handlers
+from .routes import user , auth , task_list , task , plan , deletion , admin , metrics
+from .core import exception_handlers, security
+from .core.metrics import monitor_event_loop
+from .core.background import spawn
+from .middlewares.metrics import MetricsMiddleware
+from .middlewares.context import ContextMiddleware
+from .core.config import Settings
+from .core.context import AppContext, activate
+from .db import db, indexes, migrations
+from .services.deletion import DeletionService
+from contextlib import asynccontextmanager
+from typing import Optional
+import asyncio
+import logging
 import os 
+import time
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
 
-#CORS
-app.add_middleware(
-    CORSMiddleware, 
-    allow_origins=["http://localhost:5173"],  # Frontend url 
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-# --- Register API routes ---
-app.include_router(auth.router)
-app.include_router(user.router)
-app.include_router(task_list.router)
-app.include_router(task.router)
-app.include_router(plan.router)
+async def warm_up(app: FastAPI, context: AppContext) -> dict:
+    """Get the app ready to serve, timing each phase in milliseconds."""
+    timings = {}
+    started = time.perf_counter()
 
+    async def phase(name, step):
+        start = time.perf_counter()
+        await step()
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
 
-# --- Register exception handlers ---
-app.add_exception_handler(
-    Exception, exception_handlers.general_exception_handler)
-app.add_exception_handler(
-    RequestValidationError, exception_handlers.request_validation_exception_handler)
-app.add_exception_handler(
-    HTTPException, exception_handlers.http_exception_handler)
+    async def connect():
+        db.connect(context)
+        await db.warm_up()
 
-# # --- Serve static frontend files ---
-# app.mount("/assets", StaticFiles(directory="frontend/dist/assets"), name="assets")
+    async def create_indexes():
+        await indexes.ensure_indexes()
+        if context.settings.verify_indexes:
+            await indexes.check_indexes()
 
+    async def build_schemas():
+        # Generates the JSON schema of every request and response model once.
+        app.openapi()
 
+    async def first_request():
+        # One internal request through the whole stack: builds the middleware stack, loads
+        # what the first request would import, and fills the plan count cache. It is marked
+        # as a warm-up so the http metrics leave it out.
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "root_path": "",
+            "path": "/api/v1/plans/", "raw_path": b"/api/v1/plans/", "query_string": b"limit=1",
+            "headers": [(b"host", b"warm-up")], "client": ("127.0.0.1", 0), "server": ("warm-up", 80),
+            "warm_up": True,
+        }
+        status = None
 
-# --- Catch-all to serve index.html for frontend routing ---
-@app.middleware("http")
-async def frontend_catch_all(request: Request, call_next):
-    response = await call_next(request)
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
 
-    # If the request wasn't handled by any route (404) and isn't an API request
-    if response.status_code == 404 and not request.url.path.startswith("/api"):
-        index_path = os.path.join("frontend", "dist", "index.html")
-        if os.path.exists(index_path):
-            return FileResponse(index_path)
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
 
-    return response
\ No newline at end of file
+        await app(scope, receive, send)
+        if status != 200:
+            raise RuntimeError(f"Warm-up request to {scope['path']} returned {status}")
+
+    # bcrypt runs on its own threads, so it warms up alongside the other phases.
+    hashing = asyncio.create_task(phase("password_hashing", security.warm_up))
+    try:
+        # --- Connect to MongoDB before serving ---
+        await phase("connect", connect)
+        # --- Create (and optionally verify) MongoDB indexes ---
+        await phase("indexes", create_indexes)
+        # --- Bring stored documents up to date, after the unique indexes exist ---
+        await phase("migrations", migrations.migrate)
+        await phase("schemas", build_schemas)
+        await phase("first_request", first_request)
+        # --- Resume cascade deletions interrupted by a restart ---
+        await phase("resume_deletions", DeletionService.resume_pending)
+    finally:
+        await hashing
+
+    timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+    return timings
+
+
+def create_app(config: Optional[Settings] = None) -> FastAPI:
+    """Build an app with its own settings, MongoDB client and caches; `config` defaults to the
+    environment. Serve it with `uvicorn server.main:create_app --factory`.
+    """
+    config = config or Settings()
+    context = AppContext(config)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Tasks spawned during startup, like the loop monitor and resumed deletions, keep it.
+        with activate(context):
+            try:
+                app.state.startup_timings = await warm_up(app, context)
+                logger.info("Ready to serve after %s ms: %s",
+                            app.state.startup_timings["total"], app.state.startup_timings)
+
+                loop_monitor = spawn(monitor_event_loop(config.event_loop_monitor_interval_seconds))
+                # Takes over the deletion jobs of workers that stopped
+                deletion_watch = spawn(DeletionService.watch())
+                try:
+                    yield
+                finally:
+                    loop_monitor.cancel()
+                    deletion_watch.cancel()
+            finally:
+                db.close(context)
+                context.close()
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.settings = config
+    app.state.context = context
+    app.state.startup_timings = None
+
+    #CORS
+    app.add_middleware(
+        CORSMiddleware, 
+        allow_origins=["http://localhost:5173"],  # Frontend url 
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(MetricsMiddleware)
+
+    # --- Register API routes ---
+    app.include_router(auth.router)
+    app.include_router(user.router)
+    app.include_router(task_list.router)
+    app.include_router(task.router)
+    app.include_router(plan.router)
+    app.include_router(deletion.router)
+    app.include_router(admin.router)
+    app.include_router(metrics.router)
+
+
+    # --- Register exception handlers ---
+    app.add_exception_handler(
+        Exception, exception_handlers.general_exception_handler)
+    app.add_exception_handler(
+        RequestValidationError, exception_handlers.request_validation_exception_handler)
+    app.add_exception_handler(
+        HTTPException, exception_handlers.http_exception_handler)
+
+    # # --- Serve static frontend files ---
+    # app.mount("/assets", StaticFiles(directory="frontend/dist/assets"), name="assets")
+
+
+
+    # --- Catch-all to serve index.html for frontend routing ---
+    @app.middleware("http")
+    async def frontend_catch_all(request: Request, call_next):
+        response = await call_next(request)
+
+        # If the request wasn't handled by any route (404) and isn't an API request
+        if response.status_code == 404 and not request.url.path.startswith("/api"):
+            index_path = os.path.join("frontend", "dist", "index.html")
+            if os.path.exists(index_path):
+                return FileResponse(index_path)
+
+        return response
+
+    # Added last so it wraps every other middleware.
+    app.add_middleware(ContextMiddleware, context=context)
+
+    return app
@@ -0,0 +1,19 @@
+from ..core.context import AppContext, activate
+
+
+class ContextMiddleware:
+    """Makes the context of its app current while a request or websocket is served, so the
+    services reach the settings, connection and caches of the app the request came in through.
+    """
+
+    def __init__(self, app, context: AppContext):
+        self.app = app
+        self.context = context
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        with activate(self.context):
+            await self.app(scope, receive, send)
@@ -0,0 +1,9 @@
+from ..services.deletion import DeletionService
+
+
+async def existing_plan(plan_id: str):
+    await DeletionService.ensure_parents(plan_id)
+
+
+async def existing_task_list(plan_id: str, task_list_id: str):
+    await DeletionService.ensure_parents(plan_id, [task_list_id])
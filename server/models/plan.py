@@ -9,4 +9,6 @@ class Plan(BaseModel):
     description: str
     user_id: PyObjectId
     created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None
\ No newline at end of file
+    updated_at: Optional[datetime] = None
+    # Bumped by every write to the board; board ETags derive from it
+    revision: int = 0
\ No newline at end of file
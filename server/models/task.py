@@ -11,6 +11,7 @@ class Task(BaseModel):
     task_list_id: PyObjectId
     due_date: datetime
     sort_number: int
+    rank: Optional[str] = None
     priority: str  # TODO avoid magic string here -> LOW, MEDIUM, HIGH
     status: str  # TODO avoid magic string here -> OPEN, CLOSE
     created_at: Optional[datetime] = None
@@ -5,6 +5,7 @@ from datetime import datetime
 class User(BaseModel):
     username :str
     email: EmailStr
-    full_name: str
+    password: str
+    full_name: Optional[str] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Query, Request
+from ..db import db
+from ..core.context import current
+
+router = APIRouter(prefix="/api/v1/admin", tags=["Admin"])
+
+
+@router.get("/cache-stats", name="Get cache statistics")
+async def get_cache_stats():
+    context = current()
+    return {
+        "boards": context.board_cache.stats(),
+        "counts": context.count_cache.stats(),
+        "principals": context.principal_cache.stats(),
+    }
+
+
+@router.get("/db-pool", name="Get MongoDB connection pool statistics")
+async def get_db_pool_stats():
+    return db.pool_stats()
+
+
+@router.get("/startup", name="Get startup phase timings")
+async def get_startup_timings(request: Request):
+    return {"timings_ms": request.app.state.startup_timings}
+
+
+@router.get("/slow-queries", name="Get recent slow MongoDB queries")
+async def get_slow_queries(limit: int = Query(50, ge=1, le=1000)):
+    slow_queries = current().slow_queries
+    return {"threshold_ms": slow_queries.threshold_ms,
+            "data": slow_queries.recent(limit)}
@@ -2,12 +2,15 @@ from fastapi import APIRouter, HTTPException, Depends
 from ..schemas.user import UserResponse, UserCreate, LoginRequest, Token
 from ..schemas.common import prepare_mongo_document
 from ..services.user import UserService
-from ..core.security import verify_password
+from ..core.security import verify_and_update_password
 from ..core.jwt import create_access_token
 from ..middlewares.auth import get_current_user
+from ..core import metrics
 
 router = APIRouter(prefix="/api/v1/auth", tags=["Authentication"])
 
+logins = metrics.counter("auth_logins_total", "Login attempts by outcome", labelnames=("result",))
+
 
 @router.post("/register", response_model=UserResponse, status_code=201)
 async def create_user(user: UserCreate):
@@ -17,9 +20,16 @@ async def create_user(user: UserCreate):
 @router.post("/login", response_model=Token, status_code=200)
 async def create_user(data: LoginRequest):
     user = await UserService.find_with_pass_by_email(data.email)
-    print(prepare_mongo_document(user))
-    if not user or not verify_password(data.password, user["password"]):
+    if not user:
+        logins.labels("unknown_user").inc()
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    verified, new_hash = await verify_and_update_password(data.password, user.get("password"))
+    if not verified:
+        logins.labels("wrong_password").inc()
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    logins.labels("success").inc()
+    if new_hash:
+        await UserService.update_password_hash(user["_id"], new_hash)
     userData = prepare_mongo_document(user)
     access_token = create_access_token({"user_id": userData["_id"]})
 
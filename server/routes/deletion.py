@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from ..schemas.deletion import DeletionJobResponse
+from ..services.deletion import DeletionService
+
+router = APIRouter(prefix="/api/v1/deletions", tags=["Deletions"])
+
+
+@router.get("/{job_id}", response_model=DeletionJobResponse, name="Get deletion job status")
+async def find_deletion_job_by_id(job_id: str):
+    return await DeletionService.find_by_id(job_id)
@@ -0,0 +1,36 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ..core import metrics
+from ..core.events import subscriber_count
+from ..core.context import current
+from ..core.security import password_queue_depth
+
+router = APIRouter(tags=["Metrics"])
+
+
+def _caches() -> dict:
+    """The caches of the app being scraped."""
+    context = current()
+    return {"boards": context.board_cache, "counts": context.count_cache,
+            "principals": context.principal_cache}
+
+
+metrics.callback("cache_hits_total", "Cache lookups that found a live entry",
+                 lambda: {name: cache.hits for name, cache in _caches().items()}, ("cache",), kind="counter")
+metrics.callback("cache_misses_total", "Cache lookups that found nothing or an expired entry",
+                 lambda: {name: cache.misses for name, cache in _caches().items()}, ("cache",), kind="counter")
+metrics.callback("cache_evictions_total", "Entries evicted to stay within the cache size",
+                 lambda: {name: cache.evictions for name, cache in _caches().items()}, ("cache",), kind="counter")
+metrics.callback("cache_entries", "Entries currently cached",
+                 lambda: {name: len(cache) for name, cache in _caches().items()}, ("cache",))
+metrics.callback("cache_bytes", "Size of the cached values, where tracked",
+                 lambda: {name: cache.bytes for name, cache in _caches().items() if cache.sizeof}, ("cache",))
+metrics.callback("password_hash_queue_depth", "Password hash and verify calls running or waiting",
+                 password_queue_depth)
+metrics.callback("board_event_subscribers", "WebSocket viewers subscribed to board events",
+                 subscriber_count)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
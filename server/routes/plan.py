@@ -1,9 +1,17 @@
-from fastapi import APIRouter, Query, HTTPException
-from ..schemas.plan import PlanResponse, PlanCreate, PlanUpdate, PlanPaginationResponse, PlanResponseWithTaskLists
+from fastapi import APIRouter, Query, Header, Request, Response, WebSocket
+from ..schemas.plan import PlanResponse, PlanCreate, PlanUpdate, PlanPaginationResponse, PlanResponseWithTaskLists, PlanPartialResponse, PlanPartialPaginationResponse
 from ..services.plan import PlanService
-from ..services.task_list import TaskListService
-from typing import Union
-from ..schemas.common import convert_object_ids, prepare_mongo_document
+from ..services.sync import SyncService
+from ..schemas.sync import PlanChangesResponse
+from ..services.importer import ImportService
+from ..services.exporter import ExportService
+from fastapi.responses import StreamingResponse
+from ..schemas.importer import ImportFormat, ImportResultResponse
+from ..core.responses import MongoJSONResponse
+from ..core.events import subscribe
+from typing import Optional, Union
+from ..schemas.common import CountMode
+import asyncio
 
 
 router = APIRouter(prefix="/api/v1/plans", tags=["Plans"])
@@ -14,41 +22,51 @@ async def create_plan(plan: PlanCreate):
     return await PlanService.create(plan)
 
 
-@router.get("/", response_model=PlanPaginationResponse, name="Get all plans")
+@router.get("/", response_model=Union[PlanPaginationResponse, PlanPartialPaginationResponse], name="Get all plans")
 async def find_all_plans(limit: int = Query(10, ge=1, le=100),
                          skip: int = Query(0, ge=0),
-                         search: str = "", include_all: bool = False):
-    plans = await PlanService.find_all(limit=limit, skip=skip, search=search)
+                         search: str = "", include_all: bool = False,
+                         cursor: Optional[str] = None,
+                         count_mode: CountMode = CountMode.exact,
+                         fields: Optional[str] = None):
+    return MongoJSONResponse(await PlanService.find_all(limit=limit, skip=skip, search=search, include_all=include_all, cursor=cursor, count_mode=count_mode, fields=fields))
 
-    if include_all:
-        plans_with_all = []
-        for plan in plans["data"]:
-            task_list_with_tasks = await TaskListService.find_all_with_tasks(plan_id=str(plan.id))
-            plan_obj = plan.model_dump(by_alias=True)  # Convert to dict
-            plan_obj["task_lists"] = task_list_with_tasks
-            plans_with_all.append(plan_obj)
-        return {
-            "data": prepare_mongo_document(plans_with_all),
-            "count": plans["count"]
-        }
-    else:
-        return plans
-
-
-@router.get("/{plan_id}", response_model=Union[PlanResponseWithTaskLists, PlanResponse], name="Get plan by id with task lists")
-async def find_plan_by_id_with_task_lists(plan_id: str, include_all: bool = False):
-    plan = await PlanService.find_by_id(plan_id)
-    if not plan:
-        raise HTTPException(status_code=404, detail="Plan not found")
 
+@router.get("/{plan_id}", response_model=Union[PlanResponseWithTaskLists, PlanResponse, PlanPartialResponse], name="Get plan by id with task lists")
+async def find_plan_by_id_with_task_lists(plan_id: str, include_all: bool = False, fields: Optional[str] = None,
+                                          if_none_match: Optional[str] = Header(None)):
     if include_all:
-        task_list_with_tasks = await TaskListService.find_all_with_tasks(plan_id=str(plan.id))
-        plan_obj = plan.model_dump(by_alias=True)
-        plan_obj["task_lists"] = task_list_with_tasks
+        etag, body = await PlanService.find_board(plan_id, fields=fields, if_none_match=if_none_match)
+        if body is None:
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(body, media_type="application/json", headers={"ETag": etag})
+
+    if fields:
+        return MongoJSONResponse(await PlanService.find_document(plan_id, include_all=include_all, fields=fields))
+
+    return await PlanService.find_by_id(plan_id)
+
+
+@router.get("/{plan_id}/changes", response_model=PlanChangesResponse, name="Get plan changes since a sync token")
+async def find_plan_changes(plan_id: str, since: Optional[str] = None):
+    return MongoJSONResponse(await SyncService.changes(plan_id, since=since))
+
 
-        return PlanResponseWithTaskLists(**prepare_mongo_document(plan_obj))
-    else:
-        return plan
+@router.get("/{plan_id}/export", name="Export plan as NDJSON")
+async def export_plan(plan_id: str):
+    await PlanService.find_by_id(plan_id)
+    return StreamingResponse(ExportService.export_plan(plan_id), media_type="application/x-ndjson",
+                             headers={"Content-Disposition": f'attachment; filename="plan-{plan_id}.ndjson"'})
+
+
+@router.post("/{plan_id}/import", response_model=ImportResultResponse, name="Import tasks from NDJSON or CSV")
+async def import_plan_tasks(plan_id: str, request: Request, format: Optional[ImportFormat] = None):
+    """Stream the request body, NDJSON or CSV (text/csv), into the plan's task lists."""
+    await PlanService.find_by_id(plan_id)
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = ImportFormat.csv if content_type.startswith("text/csv") else ImportFormat.ndjson
+    return await ImportService.import_tasks(plan_id, request.stream(), file_format=format)
 
 
 @router.patch("/{plan_id}", response_model=PlanResponse, name="Update plan")
@@ -58,4 +76,32 @@ async def update_plan(plan_id: str, plan: PlanUpdate):
 
 @router.delete("/{plan_id}", name="Delete plan")
 async def delete_plan(plan_id: str):
-    return await PlanService.delete(plan_id=plan_id)
\ No newline at end of file
+    return await PlanService.delete(plan_id=plan_id)
+
+async def _wait_for_disconnect(websocket: WebSocket):
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@router.websocket("/{plan_id}/events")
+async def plan_events(websocket: WebSocket, plan_id: str):
+    """Stream board deltas of a plan as JSON text messages until the client disconnects."""
+    try:
+        await PlanService.find_by_id(plan_id)
+    except Exception:
+        await websocket.close(code=1008)
+        return
+
+    with subscribe(plan_id) as queue:
+        await websocket.accept()
+        disconnected = asyncio.create_task(_wait_for_disconnect(websocket))
+        try:
+            while True:
+                message = asyncio.create_task(queue.get())
+                await asyncio.wait({message, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if disconnected.done():
+                    message.cancel()
+                    return
+                await websocket.send_text(message.result())
+        finally:
+            disconnected.cancel()
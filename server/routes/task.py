@@ -1,37 +1,52 @@
-from fastapi import APIRouter, Query
-from ..schemas.task import TaskResponse, TaskCreate, TaskUpdate, TaskPaginationResponse, TaskBulkUpdateRequest
+from fastapi import APIRouter, Depends, Query
+from ..schemas.task import TaskResponse, TaskCreate, TaskUpdate, TaskPaginationResponse, TaskBulkUpdateRequest, TaskMoveRequest, TaskPartialPaginationResponse
 from ..services.task import TaskService
+from ..schemas.common import CountMode
+from ..core.responses import MongoJSONResponse
+from ..middlewares.parents import existing_plan, existing_task_list
+from typing import Optional, Union
 
 router = APIRouter(prefix="/api/v1/plans", tags=["Tasks"])
 
+# Tasks are only reached through a plan and task list that still exist; the tasks of a deleted
+# one wait for its deletion job out of sight.
+in_task_list = [Depends(existing_task_list)]
 
-@router.post("/{plan_id}/task-lists/{task_list_id}/tasks", response_model=TaskResponse, status_code=201)
-async def create_task(task: TaskCreate):
-    return await TaskService.create(task)
 
+@router.post("/{plan_id}/task-lists/{task_list_id}/tasks", response_model=TaskResponse, status_code=201, dependencies=in_task_list)
+async def create_task(task_list_id: str, task: TaskCreate):
+    return await TaskService.create(task, task_list_id=task_list_id)
 
-@router.get("/{plan_id}/task-lists/{task_list_id}/tasks", response_model=TaskPaginationResponse, name="Get all tasks")
+
+@router.get("/{plan_id}/task-lists/{task_list_id}/tasks", response_model=Union[TaskPaginationResponse, TaskPartialPaginationResponse], name="Get all tasks", dependencies=in_task_list)
 async def find_all_tasks(task_list_id: str, limit: int = Query(10, ge=1, le=100),
                          skip: int = Query(0, ge=0),
-                         search: str = ""):
-    return await TaskService.find_all(task_list_id=task_list_id, limit=limit, skip=skip, search=search)
+                         search: str = "", cursor: Optional[str] = None,
+                         count_mode: CountMode = CountMode.exact,
+                         fields: Optional[str] = None):
+    return MongoJSONResponse(await TaskService.find_all(task_list_id=task_list_id, limit=limit, skip=skip, search=search, cursor=cursor, count_mode=count_mode, fields=fields))
+
+
+@router.get("/{plan_id}/task-lists/{task_list_id}/tasks/{task_id}", response_model=TaskResponse, name="Get task by id", dependencies=in_task_list)
+async def find_task_by_id(task_list_id: str, task_id: str):
+    return await TaskService.find_by_id(task_id=task_id, task_list_id=task_list_id)
 
 
-@router.get("/{plan_id}/task-lists/{task_list_id}/tasks/{task_id}", response_model=TaskResponse, name="Get task by id")
-async def find_task_by_id(task_id: str):
-    return await TaskService.find_by_id(task_id=task_id)
+@router.patch("/{plan_id}/task-lists/{task_list_id}/tasks/{task_id}", response_model=TaskResponse, name="Update the task", dependencies=in_task_list)
+async def update_task(task_list_id: str, task_id: str, data: TaskUpdate):
+    return await TaskService.update(task_id=task_id, data=data, task_list_id=task_list_id)
 
 
-@router.patch("/{plan_id}/task-lists/{task_list_id}/tasks/{task_id}", response_model=TaskResponse, name="Update the task")
-async def update_task(task_id: str, data: TaskUpdate):
-    return await TaskService.update(task_id=task_id, data=data)
+@router.delete("/{plan_id}/task-lists/{task_list_id}/tasks/{task_id}", name="Delete the task", dependencies=in_task_list)
+async def delete_task(task_list_id: str, task_id: str):
+    return await TaskService.delete(task_id=task_id, task_list_id=task_list_id)
 
 
-@router.delete("/{plan_id}/task-lists/{task_list_id}/tasks/{task_id}", name="Delete the task")
-async def delete_task(task_id: str):
-    return await TaskService.delete(task_id=task_id)
+@router.post("/{plan_id}/task-lists/{task_list_id}/tasks/{task_id}/move", response_model=TaskResponse, name="Move the task", dependencies=in_task_list)
+async def move_task(task_list_id: str, task_id: str, data: TaskMoveRequest):
+    return await TaskService.move(task_id=task_id, data=data, task_list_id=task_list_id)
 
 
-@router.post("/{plan_id}/task-lists/bulk-sorting-update", name="Tasks bulk sorting")
-async def bulk_update_tasks(data: TaskBulkUpdateRequest):
-    return await TaskService.bulk_update(data)
\ No newline at end of file
+@router.post("/{plan_id}/task-lists/bulk-sorting-update", name="Tasks bulk sorting", dependencies=[Depends(existing_plan)])
+async def bulk_update_tasks(plan_id: str, data: TaskBulkUpdateRequest):
+    return await TaskService.bulk_update(data, plan_id=plan_id)
\ No newline at end of file
@@ -1,20 +1,28 @@
-from fastapi import APIRouter, Query
-from ..schemas.task_list import TaskListResponse, TaskListCreate, TaskListUpdate, TaskListPaginationResponse
+from fastapi import APIRouter, Depends, Query
+from ..schemas.task_list import TaskListResponse, TaskListCreate, TaskListUpdate, TaskListPaginationResponse, TaskListPartialPaginationResponse
 from ..services.task_list import TaskListService
+from ..schemas.common import CountMode
+from ..core.responses import MongoJSONResponse
+from ..middlewares.parents import existing_plan
+from typing import Optional, Union
 
-router = APIRouter(prefix="/api/v1/plans", tags=["Task Lists"])
+# Task lists are only reached through a plan that still exists.
+router = APIRouter(prefix="/api/v1/plans", tags=["Task Lists"], dependencies=[Depends(existing_plan)])
 
 
 @router.post("/{plan_id}/task-lists", response_model=TaskListResponse, status_code=201)
-async def create_task_list(task_list: TaskListCreate):
-    return await TaskListService.create(task_list)
+async def create_task_list(plan_id: str, task_list: TaskListCreate):
+    return await TaskListService.create(task_list, plan_id=plan_id)
 
 
-@router.get("/{plan_id}/task-lists", response_model=TaskListPaginationResponse, name="Get all task lists")
+@router.get("/{plan_id}/task-lists", response_model=Union[TaskListPaginationResponse, TaskListPartialPaginationResponse], name="Get all task lists")
 async def find_all_task_lists(plan_id: str = None,  limit: int = Query(10, ge=1, le=100),
                               skip: int = Query(0, ge=0),
-                              search: str = "", include_tasks: bool = False):
-    return await TaskListService.find_all_with_pagination(plan_id, limit=limit, skip=skip, search=search, include_tasks=include_tasks)
+                              search: str = "", include_tasks: bool = False,
+                              cursor: Optional[str] = None,
+                              count_mode: CountMode = CountMode.exact,
+                              fields: Optional[str] = None):
+    return MongoJSONResponse(await TaskListService.find_all_with_pagination(plan_id, limit=limit, skip=skip, search=search, include_tasks=include_tasks, cursor=cursor, count_mode=count_mode, fields=fields))
 
 
 @router.get("/{plan_id}/task-lists/{task_list_id}", response_model=TaskListResponse, name="Get task list by id")
@@ -23,8 +31,8 @@ async def find_task_list_by_id(plan_id: str, task_list_id: str):
 
 
 @router.patch("/{plan_id}/task-lists/{task_list_id}", response_model=TaskListResponse, name="Update task list")
-async def update_task_list(task_list_id: str, task_list: TaskListUpdate):
-    return await TaskListService.update(task_list_id=task_list_id, data=task_list)
+async def update_task_list(plan_id: str, task_list_id: str, task_list: TaskListUpdate):
+    return await TaskListService.update(task_list_id=task_list_id, data=task_list, plan_id=plan_id)
 
 
 @router.delete("/{plan_id}/task-lists/{task_list_id}", name="Delete task list")
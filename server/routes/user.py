@@ -1,7 +1,10 @@
 from fastapi import APIRouter , Query
 from ..schemas.user import UserResponse, UserCreate, UserUpdate, UserPaginationResponse
 from ..services.user import UserService
-from typing import List
+from ..services.exporter import ExportService
+from fastapi.responses import StreamingResponse
+from ..schemas.common import CountMode
+from typing import List, Optional
 
 router = APIRouter(prefix="/api/v1/users" , tags = ["Users"])
 
@@ -14,8 +17,10 @@ async def create_user(user:UserCreate):
 async def find_all_users(limit: int = Query(10, ge=1, le=100),
                          skip: int = Query(0, ge=0),
                          search: str = "",
-                         email: str = ""):
-    return await UserService.find_all(limit=limit, skip=skip, search=search, email=email)
+                         email: str = "",
+                         cursor: Optional[str] = None,
+                         count_mode: CountMode = CountMode.exact):
+    return await UserService.find_all(limit=limit, skip=skip, search=search, email=email, cursor=cursor, count_mode=count_mode)
 
 
 @router.get("/{user_id}", response_model=UserResponse, name="Get user by id")
@@ -23,6 +28,13 @@ async def find_user_by_id(user_id: str):
     return await UserService.find_by_id(user_id)
 
 
+@router.get("/{user_id}/export", name="Export all plans of a user as NDJSON")
+async def export_user_plans(user_id: str):
+    await UserService.find_by_id(user_id)
+    return StreamingResponse(ExportService.export_user(user_id), media_type="application/x-ndjson",
+                             headers={"Content-Disposition": f'attachment; filename="user-{user_id}.ndjson"'})
+
+
 @router.patch("/{user_id}", response_model=UserResponse, name="Update user")
 async def update_user(user_id: str, user: UserUpdate):
     return await UserService.update(user_id=user_id, data=user)
@@ -1,6 +1,7 @@
 from bson import ObjectId
-from typing import Any
-from pydantic import GetCoreSchemaHandler, BaseModel
+from enum import Enum
+from typing import Any, Optional
+from pydantic import GetCoreSchemaHandler, BaseModel, ConfigDict, Field, create_model
 from pydantic_core import core_schema
 from pydantic.json_schema import GetJsonSchemaHandler
 
@@ -29,6 +30,32 @@ class PyObjectId(ObjectId):
         return {"type": "string"}
 
 
+class CountMode(str, Enum):
+    """How paginated endpoints compute their total count."""
+    exact = "exact"  # count_documents, cached for unfiltered per-parent queries
+    estimated = "estimated"  # collection metadata, or a count capped at estimated_count_limit
+    none = "none"  # skip counting entirely
+
+
+def response_projection(model: type[BaseModel], exclude: tuple = ()) -> dict:
+    """Mongo projection fetching exactly the fields a response model exposes."""
+    return {
+        field.alias or name: 1
+        for name, field in model.model_fields.items()
+        if name not in exclude
+    }
+
+
+def partial_model(model: type[BaseModel], name: str, **extra_fields) -> type[BaseModel]:
+    """Copy of a response model with every field optional, describing ?fields= responses."""
+    fields = {
+        field_name: (Optional[field.annotation], Field(None, alias=field.alias))
+        for field_name, field in model.model_fields.items()
+    }
+    fields.update(extra_fields)
+    return create_model(name, __config__=ConfigDict(arbitrary_types_allowed=True), **fields)
+
+
 def prepare_mongo_document(doc: Any) -> Any:
     if isinstance(doc, dict):
         return {
@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from .common import PyObjectId
+from datetime import datetime
+from bson import ObjectId
+
+
+class DeletionJobResponse(BaseModel):
+    id: PyObjectId = Field(alias="_id")
+    kind: str  # plan | task_list
+    target_id: PyObjectId
+    status: str  # pending | running | completed | failed | cancelled
+    deleted_task_lists: int
+    deleted_tasks: int
+    error: Optional[str] = None
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    class Config:
+        arbitrary_types_allowed = True
+        json_encoders = {ObjectId: str}
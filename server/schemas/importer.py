@@ -0,0 +1,34 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+from enum import Enum
+
+
+class ImportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class TaskImportRow(BaseModel):
+    """One row of an import file: a task, placed in the task list with the given title.
+    A row without a title only makes sure its task list exists.
+    """
+    task_list: str
+    title: Optional[str] = None
+    description: str = ""
+    due_date: Optional[datetime] = None
+    priority: str = "LOW"
+    status: str = "OPEN"
+
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+
+class ImportResultResponse(BaseModel):
+    imported_tasks: int
+    created_task_lists: int
+    failed_rows: int
+    errors: List[ImportRowError]
+    errors_truncated: bool
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Optional
-from .common import PyObjectId
-from .task_list import TaskListResponse, TaskListWithTasksResponse
+from .common import PyObjectId, response_projection, partial_model
+from .task_list import TaskListResponse, TaskListWithTasksResponse, TaskListPartialResponse
 from datetime import datetime
 from bson import ObjectId
 from typing import List, Union
@@ -59,6 +59,20 @@ class PlanResponseWithAll(BaseModel):
         json_encoders = {ObjectId: str}
 
 
+PLAN_PROJECTION = response_projection(PlanResponse)
+
+
 class PlanPaginationResponse(BaseModel):
     data: Union[List[PlanResponse], List[PlanResponseWithAll]]
-    count: int
\ No newline at end of file
+    count: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+PlanPartialResponse = partial_model(
+    PlanResponse, "PlanPartialResponse", task_lists=(Optional[List[TaskListPartialResponse]], None))
+
+
+class PlanPartialPaginationResponse(BaseModel):
+    data: List[PlanPartialResponse]
+    count: Optional[int] = None
+    next_cursor: Optional[str] = None
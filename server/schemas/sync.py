@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from .common import PyObjectId
+from .plan import PlanResponse
+from .task_list import TaskListResponse
+from .task import TaskResponse
+
+
+class TombstoneResponse(BaseModel):
+    kind: str  # task | task_list
+    target_id: PyObjectId
+
+
+class PlanChangesResponse(BaseModel):
+    plan: Optional[PlanResponse] = None
+    task_lists: List[TaskListResponse]
+    tasks: List[TaskResponse]
+    deleted: List[TombstoneResponse]
+    next_token: str
+    reset: bool = False
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional
-from .common import PyObjectId
+from .common import PyObjectId, response_projection, partial_model
 from datetime import datetime
 from bson import ObjectId
 from typing import List
@@ -35,6 +35,12 @@ class TaskBulkUpdateRequest(BaseModel):
     tasks: List[TaskBulkUpdateItem]
 
 
+class TaskMoveRequest(BaseModel):
+    task_list_id: str
+    before_id: Optional[str] = None  # task that should end up right above the moved one
+    after_id: Optional[str] = None  # task that should end up right below the moved one
+
+
 class TaskResponse(BaseModel):
     id: PyObjectId = Field(alias="_id")
     title: str
@@ -42,6 +48,7 @@ class TaskResponse(BaseModel):
     task_list_id: PyObjectId = Field(alias="task_list_id")
     due_date: datetime
     sort_number: int
+    rank: Optional[str] = None
     priority: str
     status: str
     created_at: Optional[datetime]
@@ -52,6 +59,19 @@ class TaskResponse(BaseModel):
         json_encoders = {ObjectId: str}
 
 
+TASK_PROJECTION = response_projection(TaskResponse)
+
+
 class TaskPaginationResponse(BaseModel):
     data: List[TaskResponse]
-    count: int
\ No newline at end of file
+    count: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+TaskPartialResponse = partial_model(TaskResponse, "TaskPartialResponse")
+
+
+class TaskPartialPaginationResponse(BaseModel):
+    data: List[TaskPartialResponse]
+    count: Optional[int] = None
+    next_cursor: Optional[str] = None
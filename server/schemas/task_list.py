@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Optional
-from .common import PyObjectId
-from .task import TaskResponse
+from .common import PyObjectId, response_projection, partial_model
+from .task import TaskResponse, TaskPartialResponse
 from datetime import datetime
 from bson import ObjectId
 from typing import List, Union
@@ -46,6 +46,20 @@ class TaskListWithTasksResponse(BaseModel):
         json_encoders = {ObjectId: str}
 
 
+TASK_LIST_PROJECTION = response_projection(TaskListResponse)
+
+
 class TaskListPaginationResponse(BaseModel):
     data: Union[List[TaskListResponse], List[TaskListWithTasksResponse]]
-    count: int
\ No newline at end of file
+    count: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+TaskListPartialResponse = partial_model(
+    TaskListResponse, "TaskListPartialResponse", tasks=(Optional[List[TaskPartialResponse]], None))
+
+
+class TaskListPartialPaginationResponse(BaseModel):
+    data: List[TaskListPartialResponse]
+    count: Optional[int] = None
+    next_cursor: Optional[str] = None
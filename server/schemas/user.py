@@ -44,4 +44,5 @@ class Token(BaseModel):
     
 class UserPaginationResponse(BaseModel):
     data: List[UserResponse]
-    count : int
+    count : Optional[int] = None
+    next_cursor : Optional[str] = None
@@ -0,0 +1,58 @@
+from ..db.db import plan_collection, task_list_collection
+from ..core.context import current
+from bson import ObjectId
+from typing import Optional
+
+# The caches live on the app context: board_cache holds encoded boards, validated against the
+# plan revision before use, and task_list_plans the plan of each task list.
+
+
+def get_board(plan_id, fields: Optional[str] = None) -> Optional[tuple]:
+    return current().board_cache.get((str(plan_id), fields or ""))
+
+
+def store_board(plan_id, fields: Optional[str], etag: str, body: bytes):
+    current().board_cache.set((str(plan_id), fields or ""), (etag, body))
+
+
+async def invalidate_boards(*plan_ids):
+    """Drop the cached boards of the given plans and bump their revision, which their ETags
+    derive from. Called after the write, so a board read at the new revision includes it.
+    """
+    context = current()
+    plan_ids = {str(plan_id) for plan_id in plan_ids}
+    context.board_cache.invalidate_where(lambda key: key[0] in plan_ids)
+    if plan_ids:
+        await plan_collection.update_many(
+            {"_id": {"$in": [ObjectId(plan_id) for plan_id in plan_ids]}}, {"$inc": {"revision": 1}})
+
+
+async def task_list_plan_ids(*task_list_ids) -> dict:
+    """The plan id of each given task list that exists, keyed by task list ObjectId."""
+    task_list_plans = current().task_list_plans
+    plan_ids = {}
+    missing = []
+    for task_list_id in {ObjectId(task_list_id) for task_list_id in task_list_ids}:
+        plan_id = task_list_plans.get(task_list_id)
+        if plan_id is None:
+            missing.append(task_list_id)
+        else:
+            plan_ids[task_list_id] = plan_id
+
+    if missing:
+        async for task_list in task_list_collection.find({"_id": {"$in": missing}}, {"plan_id": 1}):
+            task_list_plans.set(task_list["_id"], task_list["plan_id"])
+            plan_ids[task_list["_id"]] = task_list["plan_id"]
+    return plan_ids
+
+
+async def invalidate_task_list_boards(*task_list_ids) -> set:
+    """Invalidate the boards holding the given task lists and return their plan ids."""
+    plan_ids = set((await task_list_plan_ids(*task_list_ids)).values())
+    await invalidate_boards(*plan_ids)
+    return plan_ids
+
+
+def forget_task_list(task_list_id):
+    """Drop the remembered plan of a task list that moved or was deleted."""
+    current().task_list_plans.invalidate(ObjectId(task_list_id))
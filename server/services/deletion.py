@@ -0,0 +1,209 @@
+from ..db.db import deletion_job_collection, plan_collection, task_list_collection, task_collection
+from ..db.pagination import invalidate_count
+from ..schemas.deletion import DeletionJobResponse
+from ..schemas.common import prepare_mongo_document
+from ..core.background import spawn
+from ..core.context import current_settings
+from .sequence import SequenceService
+from .board_cache import invalidate_boards
+from ..core.tracing import traced
+from fastapi import HTTPException
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ReturnDocument
+import asyncio
+import logging
+import os
+import socket
+
+logger = logging.getLogger(__name__)
+
+_ACTIVE = ["pending", "running"]
+
+
+class _LeaseLost(Exception):
+    """Another worker claimed the job after this one stopped renewing its lease."""
+
+
+def _lease_until() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=current_settings().deletion_lease_seconds)
+
+
+def _new_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{ObjectId()}"
+
+
+@traced
+class DeletionService:
+    """Removes the children of a deleted plan or task list in the background.
+    The job is recorded first, then the parent is deleted inside the request; its task lists
+    and tasks are then removed in bounded batches of ids so a large cascade never holds a
+    request or floods the primary.
+    A job is run by the worker holding its lease, which it renews after every batch; a job
+    whose lease expired is taken over by the next worker that resumes jobs.
+    """
+
+    @staticmethod
+    async def create(kind: str, target_id) -> dict:
+        """Record the job of a parent about to be deleted, leased to this worker.
+        Follow with start() once the parent is gone, or discard() if it was not found.
+        """
+        job = {
+            "kind": kind,
+            "target_id": ObjectId(target_id),
+            "status": "pending",
+            "owner": _new_owner(),
+            "lease_until": _lease_until(),
+            "deleted_task_lists": 0,
+            "deleted_tasks": 0,
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow(),
+        }
+        result = await deletion_job_collection.insert_one(job)
+        job["_id"] = result.inserted_id
+        return job
+
+    @staticmethod
+    def start(job: dict):
+        spawn(DeletionService.run(job["_id"], owner=job["owner"]))
+
+    @staticmethod
+    async def discard(job: dict):
+        await deletion_job_collection.delete_one({"_id": job["_id"], "owner": job["owner"]})
+
+    @staticmethod
+    async def resume_pending():
+        """Restart jobs whose worker stopped renewing their lease; every step is idempotent."""
+        expired = {"status": {"$in": _ACTIVE},
+                   "$or": [{"lease_until": {"$lt": datetime.utcnow()}}, {"lease_until": None}]}
+        async for job in deletion_job_collection.find(expired, {"_id": 1}):
+            spawn(DeletionService.run(job["_id"]))
+
+    @staticmethod
+    async def watch():
+        """Resume expired jobs once per lease period, for as long as the app runs."""
+        while True:
+            await asyncio.sleep(current_settings().deletion_lease_seconds)
+            try:
+                await DeletionService.resume_pending()
+            except Exception:
+                logger.exception("Could not resume deletion jobs")
+
+    @staticmethod
+    async def ensure_parents(plan_id=None, task_list_ids=(), verified_plan_id=None):
+        """Raise 404 unless the plan and the task lists exist, the lists belong to `plan_id`
+        when given, and their own plans exist. A parent is gone as soon as its deletion starts,
+        so its children left to the job are neither read through it nor given new tasks.
+        `verified_plan_id` is a plan the caller has already checked and is not looked up again.
+        """
+        try:
+            plan_ids = {ObjectId(plan_id)} if plan_id else set()
+            task_list_obj_ids = list({ObjectId(task_list_id) for task_list_id in task_list_ids})
+            verified_plan_obj_id = ObjectId(verified_plan_id) if verified_plan_id else None
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid ID format: {e}")
+
+        if task_list_obj_ids:
+            query = {"_id": {"$in": task_list_obj_ids}}
+            if plan_id:
+                query["plan_id"] = ObjectId(plan_id)
+            task_lists = await task_list_collection.find(query, {"plan_id": 1}).to_list(length=None)
+            if len(task_lists) < len(task_list_obj_ids):
+                raise HTTPException(status_code=404, detail="Task list not found")
+            plan_ids.update(task_list["plan_id"] for task_list in task_lists)
+
+        plan_ids.discard(verified_plan_obj_id)
+        if plan_ids and await plan_collection.count_documents({"_id": {"$in": list(plan_ids)}}) < len(plan_ids):
+            raise HTTPException(status_code=404, detail="Plan not found")
+
+    @staticmethod
+    async def find_by_id(job_id: str):
+        try:
+            job = await deletion_job_collection.find_one({"_id": ObjectId(job_id)})
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid job id")
+        if not job:
+            raise HTTPException(status_code=404, detail="Deletion job not found")
+
+        return DeletionJobResponse(**prepare_mongo_document(job))
+
+    @staticmethod
+    async def run(job_id: ObjectId, owner: str = None):
+        """Claim the job and run it. `owner` is the lease of a job this worker just created;
+        without it only a job whose lease expired is claimed.
+        """
+        claimable = [{"lease_until": {"$lt": datetime.utcnow()}}, {"lease_until": None}]
+        if owner:
+            claimable.append({"owner": owner})
+        job = await deletion_job_collection.find_one_and_update(
+            {"_id": job_id, "status": {"$in": _ACTIVE}, "$or": claimable},
+            {"$set": {"status": "running", "owner": owner or _new_owner(), "lease_until": _lease_until(),
+                      "updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER)
+        if not job:
+            return
+        lease = {"_id": job_id, "owner": job["owner"]}
+        try:
+            parents = plan_collection if job["kind"] == "plan" else task_list_collection
+            if await parents.count_documents({"_id": job["target_id"]}, limit=1):
+                # The worker that recorded the job stopped before deleting the parent.
+                await deletion_job_collection.update_one(
+                    lease, {"$set": {"status": "cancelled", "updated_at": datetime.utcnow()}})
+                return
+
+            if job["kind"] == "plan":
+                await DeletionService._delete_task_lists(lease, job["target_id"])
+                invalidate_count("task_lists", job["target_id"])
+                await invalidate_boards(job["target_id"])
+            else:
+                await DeletionService._delete_tasks(lease, [job["target_id"]])
+                await SequenceService.delete([job["target_id"]])
+            invalidate_count("tasks")
+            await deletion_job_collection.update_one(
+                lease, {"$set": {"status": "completed", "updated_at": datetime.utcnow()}})
+        except _LeaseLost:
+            logger.warning("Deletion job %s was taken over by another worker", job_id)
+        except Exception as e:
+            logger.exception("Deletion job %s failed", job_id)
+            await deletion_job_collection.update_one(
+                lease, {"$set": {"status": "failed", "error": str(e), "updated_at": datetime.utcnow()}})
+
+    @staticmethod
+    async def _delete_task_lists(lease: dict, plan_id: ObjectId):
+        batch_size = current_settings().deletion_batch_size
+        while True:
+            task_lists = await task_list_collection.find(
+                {"plan_id": plan_id}, {"_id": 1}).limit(batch_size).to_list(length=None)
+            if not task_lists:
+                return
+            task_list_ids = [task_list["_id"] for task_list in task_lists]
+
+            await DeletionService._delete_tasks(lease, task_list_ids)
+            result = await task_list_collection.delete_many({"_id": {"$in": task_list_ids}})
+            await SequenceService.delete(task_list_ids)
+            await DeletionService._progress(lease, deleted_task_lists=result.deleted_count)
+
+    @staticmethod
+    async def _delete_tasks(lease: dict, task_list_ids: list):
+        batch_size = current_settings().deletion_batch_size
+        while True:
+            tasks = await task_collection.find(
+                {"task_list_id": {"$in": task_list_ids}}, {"_id": 1}).limit(batch_size).to_list(length=None)
+            if not tasks:
+                return
+
+            result = await task_collection.delete_many({"_id": {"$in": [task["_id"] for task in tasks]}})
+            await DeletionService._progress(lease, deleted_tasks=result.deleted_count)
+
+    @staticmethod
+    async def _progress(lease: dict, deleted_task_lists: int = 0, deleted_tasks: int = 0):
+        """Record a batch and renew the lease; stop if another worker has taken the job over."""
+        result = await deletion_job_collection.update_one(
+            lease,
+            {"$inc": {"deleted_task_lists": deleted_task_lists, "deleted_tasks": deleted_tasks},
+             "$set": {"lease_until": _lease_until(), "updated_at": datetime.utcnow()}}
+        )
+        if result.matched_count == 0:
+            raise _LeaseLost()
+        # Leave room for foreground traffic between batches.
+        await asyncio.sleep(current_settings().deletion_batch_delay_seconds)
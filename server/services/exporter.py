@@ -0,0 +1,68 @@
+from ..db.db import plan_collection, task_list_collection, task_collection
+from ..schemas.plan import PLAN_PROJECTION
+from ..schemas.task_list import TASK_LIST_PROJECTION
+from ..schemas.task import TASK_PROJECTION
+from ..core.context import current_settings
+from ..core.responses import dumps
+from .task import TASK_ORDER
+from bson import ObjectId
+
+# Encoded lines are flushed to the client once this many bytes are pending.
+_FLUSH_BYTES = 64 * 1024
+
+# Tasks grouped by list and in board order within it: walks the (task_list_id, rank) index
+# instead of sorting the tasks of a whole plan in memory.
+EXPORT_TASK_ORDER = [("task_list_id", 1), *TASK_ORDER]
+
+
+class ExportService:
+    """NDJSON exports streamed straight from Motor cursors.
+    Each line is one document tagged with its "type" (plan, task_list or task), parents first.
+    Only one cursor batch and the task list ids of the current plan are held at a time.
+    """
+
+    @staticmethod
+    async def export_plan(plan_id: str):
+        plans = plan_collection.find({"_id": ObjectId(plan_id)}, PLAN_PROJECTION)
+        async for chunk in ExportService._plans(plans):
+            yield chunk
+
+    @staticmethod
+    async def export_user(user_id: str):
+        plans = plan_collection.find({"user_id": ObjectId(user_id)}, PLAN_PROJECTION).sort(
+            [("created_at", 1), ("_id", 1)])
+        async for chunk in ExportService._plans(plans):
+            yield chunk
+
+    @staticmethod
+    async def _plans(plans):
+        batch_size = current_settings().export_batch_size
+        pending = bytearray()
+        async for plan in plans.batch_size(batch_size):
+            pending += ExportService._line("plan", plan)
+
+            task_list_ids = []
+            task_lists = task_list_collection.find({"plan_id": plan["_id"]}, TASK_LIST_PROJECTION).sort(
+                [("created_at", 1), ("_id", 1)]).batch_size(batch_size)
+            async for task_list in task_lists:
+                task_list_ids.append(task_list["_id"])
+                pending += ExportService._line("task_list", task_list)
+                if len(pending) >= _FLUSH_BYTES:
+                    yield bytes(pending)
+                    pending.clear()
+
+            if task_list_ids:
+                tasks = task_collection.find({"task_list_id": {"$in": task_list_ids}}, TASK_PROJECTION).sort(
+                    EXPORT_TASK_ORDER).batch_size(batch_size)
+                async for task in tasks:
+                    pending += ExportService._line("task", task)
+                    if len(pending) >= _FLUSH_BYTES:
+                        yield bytes(pending)
+                        pending.clear()
+
+        if pending:
+            yield bytes(pending)
+
+    @staticmethod
+    def _line(kind: str, doc: dict) -> bytes:
+        return dumps({"type": kind, **doc}) + b"\n"
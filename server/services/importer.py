@@ -0,0 +1,202 @@
+from ..db.db import task_list_collection, task_collection
+from ..schemas.importer import TaskImportRow, ImportFormat
+from ..models.task import Task
+from ..models.task_list import TaskList
+from ..db.pagination import invalidate_count
+from ..core.context import current_settings
+from ..core.events import publish
+from ..core.ranking import rank_from_index
+from .sequence import SequenceService
+from .board_cache import invalidate_boards
+from ..core.tracing import traced
+from fastapi import HTTPException
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+from datetime import datetime
+from bson import ObjectId
+import csv
+import json
+
+
+def _too_long(max_bytes: int) -> ValueError:
+    return ValueError(f"Row is longer than {max_bytes} bytes")
+
+
+async def _lines(chunks, max_bytes: int):
+    """Split a stream of byte chunks into decoded lines, holding at most one partial line.
+    A line longer than `max_bytes` is dropped as it arrives and yields an error instead.
+    """
+    pending = b""
+    oversized = False
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if oversized or len(line) > max_bytes:
+                oversized = False
+                yield _too_long(max_bytes)
+            else:
+                yield line.rstrip(b"\r").decode("utf-8", errors="replace")
+        if len(pending) > max_bytes:
+            oversized, pending = True, b""
+    if oversized:
+        yield _too_long(max_bytes)
+    elif pending.strip():
+        yield pending.rstrip(b"\r").decode("utf-8", errors="replace")
+
+
+async def _ndjson_records(lines):
+    """Yield the object of each non-blank line, or the error that made it unreadable."""
+    async for line in lines:
+        if isinstance(line, Exception):
+            yield line
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield e
+
+
+async def _csv_records(lines, max_bytes: int):
+    """Yield a dict per CSV record, keyed by the header row; empty cells are left out.
+    A record longer than `max_bytes` yields an error and the rest of it is skipped.
+    """
+    header = None
+    record = ""
+    skipping = False
+    async for line in lines:
+        if isinstance(line, Exception):
+            record, skipping = "", False
+            yield line
+            continue
+        if skipping:
+            # Only the quotes matter until the oversized record ends.
+            skipping = line.count('"') % 2 == 0
+            continue
+        # A record continues on the next line while one of its quoted fields is open.
+        record = record + "\n" + line if record else line
+        quoted = record.count('"') % 2
+        if len(record) > max_bytes:
+            record, skipping = "", bool(quoted)
+            yield _too_long(max_bytes)
+            continue
+        if quoted:
+            continue
+        values, record = next(csv.reader([record])), ""
+        if header is None:
+            header = [name.strip() for name in values]
+        elif any(value.strip() for value in values):
+            yield {name: value for name, value in zip(header, values) if value != ""}
+    if record:
+        yield ValueError("Unterminated quoted field")
+
+
+@traced
+class ImportService:
+    """Streams an NDJSON or CSV upload into a plan.
+    Rows are validated one at a time and inserted in batches of `import_batch_size`, so memory
+    stays bounded whatever the file size. Invalid rows are reported and skipped.
+    """
+
+    @staticmethod
+    async def import_tasks(plan_id: str, chunks, file_format: ImportFormat = ImportFormat.ndjson):
+        try:
+            plan_obj_id = ObjectId(plan_id)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid plan_id")
+
+        # Task list ids of the plan by title; lists named in the file are created on first use.
+        task_lists = {
+            task_list["title"]: task_list["_id"]
+            async for task_list in task_list_collection.find({"plan_id": plan_obj_id}, {"title": 1})
+        }
+        result = {"imported_tasks": 0, "created_task_lists": 0, "failed_rows": 0,
+                  "errors": [], "errors_truncated": False}
+
+        max_bytes = current_settings().import_max_record_bytes
+        lines = _lines(chunks, max_bytes)
+        records = _csv_records(lines, max_bytes) if file_format == ImportFormat.csv else _ndjson_records(lines)
+        batch = []
+        row_number = 0
+        async for record in records:
+            row_number += 1
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                if not isinstance(record, dict):
+                    raise ValueError("A row must be an object")
+                row = TaskImportRow(**record)
+                if row.title and row.due_date is None:
+                    raise ValueError("due_date is required for a task")
+            except ValidationError as e:
+                ImportService._fail(result, row_number, "; ".join(
+                    f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()))
+                continue
+            except ValueError as e:
+                ImportService._fail(result, row_number, str(e))
+                continue
+
+            batch.append((row_number, row))
+            if len(batch) == current_settings().import_batch_size:
+                await ImportService._insert_batch(plan_obj_id, task_lists, batch, result)
+                batch = []
+
+        if batch:
+            await ImportService._insert_batch(plan_obj_id, task_lists, batch, result)
+
+        invalidate_count("task_lists", plan_obj_id)
+        invalidate_count("tasks")
+        await invalidate_boards(plan_obj_id)
+        publish(plan_obj_id, "board.imported", imported_tasks=result["imported_tasks"])
+        return result
+
+    @staticmethod
+    def _fail(result: dict, row_number: int, error: str):
+        result["failed_rows"] += 1
+        if len(result["errors"]) < current_settings().import_max_errors:
+            result["errors"].append({"row": row_number, "error": error})
+        else:
+            result["errors_truncated"] = True
+
+    @staticmethod
+    async def _insert_batch(plan_obj_id: ObjectId, task_lists: dict, batch: list, result: dict):
+        now = datetime.utcnow()
+        missing = list(dict.fromkeys(row.task_list for _, row in batch if row.task_list not in task_lists))
+        if missing:
+            created = await task_list_collection.insert_many([
+                TaskList(title=title, description="", plan_id=str(plan_obj_id),
+                         created_at=now, updated_at=now).model_dump()
+                for title in missing
+            ])
+            task_lists.update(zip(missing, created.inserted_ids))
+            result["created_task_lists"] += len(missing)
+
+        rows = [(row_number, row) for row_number, row in batch if row.title]
+        counts = {}
+        for _, row in rows:
+            counts[row.task_list] = counts.get(row.task_list, 0) + 1
+        next_sort_numbers = {
+            title: await SequenceService.reserve(task_lists[title], count)
+            for title, count in counts.items()
+        }
+
+        tasks = []
+        for _, row in rows:
+            sort_number = next_sort_numbers[row.task_list]
+            next_sort_numbers[row.task_list] += 1
+            tasks.append(Task(title=row.title, description=row.description, task_list_id=str(task_lists[row.task_list]),
+                              due_date=row.due_date, priority=row.priority, status=row.status,
+                              sort_number=sort_number, rank=rank_from_index(sort_number),
+                              created_at=now, updated_at=now).model_dump())
+        if not tasks:
+            return
+
+        try:
+            inserted = await task_collection.insert_many(tasks, ordered=False)
+            result["imported_tasks"] += len(inserted.inserted_ids)
+        except BulkWriteError as e:
+            result["imported_tasks"] += e.details.get("nInserted", 0)
+            for error in e.details.get("writeErrors", []):
+                ImportService._fail(result, rows[error["index"]][0], error.get("errmsg", "Write failed"))
@@ -1,12 +1,34 @@
-from ..db.db import plan_collection, task_list_collection, task_collection
+from ..db.db import plan_collection
 from ..schemas.plan import PlanCreate, PlanResponse, PlanUpdate
-from ..schemas.common import prepare_mongo_document
+from ..schemas.task_list import TaskListResponse
+from ..schemas.task import TaskResponse
+from ..schemas.common import prepare_mongo_document, CountMode
+from ..db.pagination import find_page, count_documents, invalidate_count
+from ..db.search import text_search
+from ..db.fields import sparse_projections
 from ..models.plan import Plan
+from .task_list import TaskListService
+from .deletion import DeletionService
+from .board_cache import get_board, store_board, invalidate_boards
+from ..core.responses import dumps, etag_matches
+from ..core.events import publish
+from ..core.tracing import traced
 from fastapi import HTTPException
 from datetime import datetime
 from bson import ObjectId
+from typing import Optional
+import hashlib
 
 
+# Nesting levels a plan response can be trimmed at with ?fields=
+PLAN_FIELD_LEVELS = {
+    "": (PlanResponse, None),
+    "task_lists": (TaskListResponse, "plan_id"),
+    "tasks": (TaskResponse, "task_list_id"),
+}
+
+
+@traced
 class PlanService:
     @staticmethod
     async def create(plan : PlanCreate):
@@ -14,26 +36,94 @@ class PlanService:
                          created_at=datetime.utcnow(), updated_at=datetime.utcnow()).model_dump()
         result = await plan_collection.insert_one(plan_data)
         plan_data["_id"] = result.inserted_id
+        invalidate_count("plans")
 
         return PlanResponse(**prepare_mongo_document(plan_data))
     
     
     @staticmethod
-    async def find_all(limit: int = 10, skip: int = 0, search: str = ""):
+    async def find_all(limit: int = 10, skip: int = 0, search: str = "", include_all: bool = False, cursor: Optional[str] = None, count_mode: CountMode = CountMode.exact, fields: Optional[str] = None):
+        """List plans as projected raw documents, ready for MongoJSONResponse."""
+        projections = sparse_projections(fields, PLAN_FIELD_LEVELS)
         query = {}
 
+        search = text_search(search)
         if search:
-            query["title"] = {"$regex": search, "$options": "i"}
+            query["$text"] = search
 
-        total_count = await plan_collection.count_documents(query)
+        total_count = await count_documents(plan_collection, query, count_mode,
+                                            cache_key=None if search else ("plans", None))
 
-        plan_cursor = plan_collection.find(query).skip(
-            skip).limit(limit).sort("created_at", -1)
+        plans, next_cursor = await find_page(
+            plan_collection, query, limit=limit, skip=skip, cursor=cursor, ranked=bool(search),
+            projection=projections[""])
 
-        plans = [PlanResponse(**prepare_mongo_document(plan)) async for plan in plan_cursor]
+        if include_all:
+            task_lists_by_plan = await TaskListService.group_task_lists_by_plan(
+                [plan["_id"] for plan in plans], projection=projections["task_lists"],
+                task_projection=projections["tasks"])
+            for plan in plans:
+                plan["task_lists"] = task_lists_by_plan[plan["_id"]]
 
-        return {"data": plans, "count": total_count}
+        return {"data": plans, "count": total_count, "next_cursor": next_cursor}
     
+    @staticmethod
+    async def find_document(plan_id: str, include_all: bool = False, fields: Optional[str] = None, with_revision: bool = False):
+        """A plan as a projected raw document, optionally with its task lists and their tasks.
+        `with_revision` also fetches the board revision, read before the lists and tasks.
+        """
+        projections = sparse_projections(fields, PLAN_FIELD_LEVELS)
+        projection = {**projections[""], "revision": 1} if with_revision else projections[""]
+        plan = await plan_collection.find_one({"_id": ObjectId(plan_id)}, projection)
+        if not plan:
+            raise HTTPException(status_code=404, detail="Plan not found")
+
+        if include_all:
+            task_lists_by_plan = await TaskListService.group_task_lists_by_plan(
+                [plan["_id"]], projection=projections["task_lists"],
+                task_projection=projections["tasks"])
+            plan["task_lists"] = task_lists_by_plan[plan["_id"]]
+        return plan
+
+    @staticmethod
+    def board_etag(plan: dict, fields: Optional[str] = None) -> str:
+        """A weak ETag for the board of a plan document carrying its revision.
+        Every write to the plan, its lists or their tasks bumps the revision.
+        """
+        version = f"{plan['_id']}|{plan.get('revision', 0)}|{fields or ''}"
+        return 'W/"' + hashlib.blake2b(version.encode(), digest_size=12).hexdigest() + '"'
+
+    @staticmethod
+    async def board_version(plan_id: str, fields: Optional[str] = None) -> str:
+        """The ETag of the hydrated board of a plan, from one projected read of the plan."""
+        plan = await plan_collection.find_one({"_id": ObjectId(plan_id)}, {"revision": 1})
+        if not plan:
+            raise HTTPException(status_code=404, detail="Plan not found")
+        return PlanService.board_etag(plan, fields)
+
+    @staticmethod
+    async def find_board(plan_id: str, fields: Optional[str] = None, if_none_match: Optional[str] = None) -> tuple:
+        """The ETag and encoded JSON of a hydrated plan board, served from the board cache when possible.
+        The body is None when `if_none_match` already matches; nothing is hydrated then.
+        A cached board is only served while the stored revision still matches, so writes made
+        through other workers are never answered from this one's cache.
+        """
+        cached = get_board(plan_id, fields)
+        if cached or if_none_match:
+            etag = await PlanService.board_version(plan_id, fields=fields)
+            if etag_matches(if_none_match, etag):
+                return etag, None
+            if cached and cached[0] == etag:
+                return cached
+
+        # The revision comes with the plan itself, so a full GET reads the plan once.
+        plan = await PlanService.find_document(plan_id, include_all=True, fields=fields, with_revision=True)
+        etag = PlanService.board_etag(plan, fields)
+        plan.pop("revision", None)
+        body = dumps(plan)
+        store_board(plan_id, fields, etag, body)
+        return etag, body
+
     @staticmethod
     async def find_by_id(plan_id: str):
         plan = await plan_collection.find_one({"_id": ObjectId(plan_id)})
@@ -52,25 +142,26 @@ class PlanService:
         if result.modified_count == 0:
             raise HTTPException(
                 status_code=404, detail="Plan not found or no changes")
-        return await PlanService.find_by_id(plan_id)
+        await invalidate_boards(plan_id)
+        plan = await PlanService.find_by_id(plan_id)
+        publish(plan_id, "plan.updated", plan=plan.model_dump(by_alias=True))
+        return plan
 
 
     @staticmethod
     async def delete(plan_id: str):
-        # 1. Delete the Plan
+        # Recorded before the plan goes, so its TaskLists and Tasks always have a job to remove them
+        job = await DeletionService.create("plan", plan_id)
         result = await plan_collection.delete_one({"_id": ObjectId(plan_id)})
         if result.deleted_count == 0:
+            await DeletionService.discard(job)
             raise HTTPException(status_code=404, detail="Plan not found")
+        invalidate_count("plans")
+        await invalidate_boards(plan_id)
+        publish(plan_id, "plan.deleted")
 
-        # 2. Find all TaskLists under the Plan
-        task_lists = await task_list_collection.find({"plan_id": ObjectId(plan_id)}).to_list(length=None)
-        task_list_ids = [task_list["_id"] for task_list in task_lists]
-
-        # 3. Delete all Tasks under those TaskLists
-        if task_list_ids:
-            await task_collection.delete_many({"task_list_id": {"$in": task_list_ids}})
-
-        # 4. Delete all TaskLists under the Plan
-        await task_list_collection.delete_many({"plan_id": ObjectId(plan_id)})
+        # Its TaskLists and Tasks are removed in the background
+        DeletionService.start(job)
 
-        return {"message": "Plan and associated TaskLists and Tasks deleted successfully"}
\ No newline at end of file
+        return {"message": "Plan deleted, associated TaskLists and Tasks are being removed",
+                "job_id": str(job["_id"])}
\ No newline at end of file
@@ -0,0 +1,61 @@
+from ..db.db import counter_collection, task_collection
+from ..core.tracing import traced
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
+
+
+def _task_sort_key(task_list_id) -> str:
+    return f"task_sort:{task_list_id}"
+
+
+@traced
+class SequenceService:
+    @staticmethod
+    async def reserve(task_list_id, count: int = 1) -> int:
+        """Atomically reserve `count` consecutive sort numbers in a task list.
+        Returns the first reserved number.
+        """
+        key = _task_sort_key(task_list_id)
+        counter = await counter_collection.find_one_and_update(
+            {"_id": key}, {"$inc": {"next": count}}, return_document=ReturnDocument.AFTER)
+
+        if counter is None:
+            await SequenceService._seed(task_list_id)
+            counter = await counter_collection.find_one_and_update(
+                {"_id": key}, {"$inc": {"next": count}}, return_document=ReturnDocument.AFTER)
+
+        return counter["next"] - count
+
+    @staticmethod
+    async def _seed(task_list_id):
+        # First allocation in a list: continue after the tasks it already holds.
+        last_task = await task_collection.find_one(
+            {"task_list_id": ObjectId(task_list_id)},
+            {"sort_number": 1},
+            sort=[("sort_number", -1)]
+        )
+        next_sort_number = (last_task.get(
+            "sort_number", 0) + 1) if last_task else 0
+        try:
+            await counter_collection.update_one(
+                {"_id": _task_sort_key(task_list_id)},
+                {"$max": {"next": next_sort_number}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            pass  # seeded concurrently by another request
+
+    @staticmethod
+    async def advance(next_by_task_list: dict):
+        """Make sure existing counters stay above sort numbers assigned outside reserve()."""
+        if next_by_task_list:
+            await counter_collection.bulk_write([
+                UpdateOne({"_id": _task_sort_key(task_list_id)}, {"$max": {"next": next_sort_number}})
+                for task_list_id, next_sort_number in next_by_task_list.items()
+            ], ordered=False)
+
+    @staticmethod
+    async def delete(task_list_ids: list):
+        await counter_collection.delete_many(
+            {"_id": {"$in": [_task_sort_key(task_list_id) for task_list_id in task_list_ids]}})
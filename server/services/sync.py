@@ -0,0 +1,84 @@
+from ..db.db import plan_collection, task_list_collection, task_collection, tombstone_collection
+from ..schemas.plan import PLAN_PROJECTION
+from ..schemas.task_list import TASK_LIST_PROJECTION
+from ..schemas.task import TASK_PROJECTION
+from ..core.context import current_settings
+from ..core.tracing import traced
+from fastapi import HTTPException
+from datetime import datetime, timedelta
+from bson import ObjectId
+from typing import Optional
+import base64
+import json
+
+
+def encode_token(moment: datetime) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"since": moment.isoformat()}).encode()).decode()
+
+
+def decode_token(token: str) -> datetime:
+    try:
+        return datetime.fromisoformat(json.loads(base64.urlsafe_b64decode(token.encode()))["since"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+
+
+@traced
+class SyncService:
+    """Incremental sync of a plan board.
+    Changes are found through updated_at, deletions through tombstones kept for
+    `tombstone_retention_days`. Each read looks back `sync_overlap_seconds` before the token
+    so writes stamped just before a read but committed after it are not missed; clients apply
+    changes idempotently and may see a row twice.
+    """
+
+    @staticmethod
+    async def record_deletion(plan_id, kind: str, target_id):
+        await tombstone_collection.insert_one({
+            "plan_id": ObjectId(plan_id),
+            "kind": kind,
+            "target_id": ObjectId(target_id),
+            "deleted_at": datetime.utcnow(),
+        })
+
+    @staticmethod
+    async def changes(plan_id: str, since: Optional[str] = None):
+        """Task lists, tasks and deletions of a plan since a sync token, or the whole board without one."""
+        settings = current_settings()
+        now = datetime.utcnow()
+        reset = False
+        changed = {}
+        if since:
+            moment = decode_token(since)
+            if moment < now - timedelta(days=settings.tombstone_retention_days):
+                # Older tombstones are gone; only a full snapshot is complete.
+                reset = True
+            else:
+                changed = {"updated_at": {"$gte": moment - timedelta(seconds=settings.sync_overlap_seconds)}}
+
+        plan_obj_id = ObjectId(plan_id)
+        plan = await plan_collection.find_one({"_id": plan_obj_id, **changed}, PLAN_PROJECTION)
+        if not plan and not await plan_collection.find_one({"_id": plan_obj_id}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Plan not found")
+
+        task_list_ids = [task_list["_id"] async for task_list in task_list_collection.find(
+            {"plan_id": plan_obj_id}, {"_id": 1})]
+        task_lists = await task_list_collection.find(
+            {"plan_id": plan_obj_id, **changed}, TASK_LIST_PROJECTION).to_list(length=None)
+        tasks = await task_collection.find(
+            {"task_list_id": {"$in": task_list_ids}, **changed}, TASK_PROJECTION).to_list(length=None)
+
+        deleted = []
+        if changed:
+            deleted = await tombstone_collection.find(
+                {"plan_id": plan_obj_id, "deleted_at": changed["updated_at"]},
+                {"_id": 0, "kind": 1, "target_id": 1}).sort("deleted_at", 1).to_list(length=None)
+
+        return {
+            "plan": plan,
+            "task_lists": task_lists,
+            "tasks": tasks,
+            "deleted": deleted,
+            "next_token": encode_token(now),
+            "reset": reset,
+        }
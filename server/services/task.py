@@ -1,35 +1,60 @@
 from ..db.db import task_collection
-from ..schemas.task import TaskCreate, TaskResponse, TaskUpdate, TaskBulkUpdateRequest
-from ..schemas.common import prepare_mongo_document
+from ..schemas.task import TaskCreate, TaskResponse, TaskUpdate, TaskBulkUpdateRequest, TaskMoveRequest
+from ..schemas.common import prepare_mongo_document, CountMode
+from ..db.pagination import find_page, count_documents, invalidate_count
+from ..db.search import text_search
+from ..db.fields import sparse_projections
 from ..models.task import Task
+from ..core.context import current_settings
+from ..core.background import spawn
+from ..core.ranking import rank_from_index, rank_between
+from .sequence import SequenceService
+from .deletion import DeletionService
+from .board_cache import invalidate_boards, invalidate_task_list_boards, task_list_plan_ids
+from ..core.events import publish
+from .sync import SyncService
+from ..core.tracing import traced
 from fastapi import HTTPException
 from datetime import datetime
 from bson import ObjectId
-from pymongo import UpdateOne
+from typing import Optional
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError
 
 
+# Board order of the tasks within a list. Tasks created before rank keys existed have
+# no rank and sort first, by sort_number, until their list is rebalanced.
+TASK_ORDER = [("rank", 1), ("sort_number", 1)]
+
+BULK_CHUNK_SIZE = 1000
+
+
+@traced
 class TaskService:
     @staticmethod
-    async def create(task : TaskCreate):
-        last_task = await task_collection.find_one(
-            {"task_list_id": ObjectId(task.task_list_id)},
-            sort=[("sort_number", -1)]
-        )
-        
-        next_sort_number = (last_task.get(
-            "sort_number", 0) + 1) if last_task else 0
+    async def create(task : TaskCreate, task_list_id: Optional[str] = None):
+        # `task_list_id` is the list the route has already checked; another one is looked up here.
+        if task.task_list_id != task_list_id:
+            await DeletionService.ensure_parents(task_list_ids=[task.task_list_id])
+        next_sort_number = await SequenceService.reserve(task.task_list_id)
 
-
-        task_data = Task(title=task.title, description=task.description, task_list_id=task.task_list_id, priority=task.priority, status=task.status, due_date=task.due_date, sort_number=next_sort_number,
+        task_data = Task(title=task.title, description=task.description, task_list_id=task.task_list_id, priority=task.priority, status=task.status, due_date=task.due_date, sort_number=next_sort_number, rank=rank_from_index(next_sort_number),
                          created_at=datetime.utcnow(), updated_at=datetime.utcnow()).model_dump()
         result = await task_collection.insert_one(task_data)
         task_data["_id"] = result.inserted_id
+        invalidate_count("tasks", task.task_list_id)
+        plan_ids = await invalidate_task_list_boards(task.task_list_id)
 
-        return TaskResponse(**prepare_mongo_document(task_data))
+        response = TaskResponse(**prepare_mongo_document(task_data))
+        for plan_id in plan_ids:
+            publish(plan_id, "task.created", task=response.model_dump(by_alias=True))
+        return response
     
 
     @staticmethod
-    async def find_all(task_list_id: str = None, limit: int = 10, skip: int = 0, search: str = ""):
+    async def find_all(task_list_id: str = None, limit: int = 10, skip: int = 0, search: str = "", cursor: Optional[str] = None, count_mode: CountMode = CountMode.exact, fields: Optional[str] = None):
+        """List tasks as projected raw documents, ready for MongoJSONResponse."""
+        projection = sparse_projections(fields, {"": (TaskResponse, None)})[""]
         query = {}
 
         if task_list_id:
@@ -40,79 +65,322 @@ class TaskService:
                     status_code=400, detail="Invalid task_list_id")
             query = {"task_list_id": task_list_obj_id}
 
+        search = text_search(search)
         if search:
-            query["title"] = {"$regex": search, "$options": "i"}
-
-        total_count = await task_collection.count_documents(query)
+            if not task_list_id:
+                raise HTTPException(
+                    status_code=400, detail="Search requires a task_list_id")
+            query["$text"] = search
 
-        task_cursor = task_collection.find(query).skip(
-            skip).limit(limit).sort("created_at", -1)
+        total_count = await count_documents(task_collection, query, count_mode,
+                                            cache_key=None if search else ("tasks", task_list_id))
 
-        tasks = [TaskResponse(**prepare_mongo_document(task)) async for task in task_cursor]
+        tasks, next_cursor = await find_page(
+            task_collection, query, limit=limit, skip=skip, cursor=cursor, ranked=bool(search),
+            projection=projection)
 
-        return {"data": tasks, "count": total_count}
+        return {"data": tasks, "count": total_count, "next_cursor": next_cursor}
 
 
     
     @staticmethod
-    async def find_by_id(task_id: str):
-        task = await task_collection.find_one({"_id": ObjectId(task_id)})
+    def _match(task_id: str, task_list_id: Optional[str] = None) -> dict:
+        """Filter on a task, within `task_list_id` when given."""
+        query = {"_id": ObjectId(task_id)}
+        if task_list_id:
+            query["task_list_id"] = ObjectId(task_list_id)
+        return query
+
+    @staticmethod
+    async def find_by_id(task_id: str, task_list_id: Optional[str] = None):
+        task = await task_collection.find_one(TaskService._match(task_id, task_list_id))
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
 
         return TaskResponse(**prepare_mongo_document(task))
 
     @staticmethod
-    async def update(task_id: str, data: TaskUpdate):
+    async def update(task_id: str, data: TaskUpdate, task_list_id: Optional[str] = None):
         update_data = data.model_dump(exclude_unset=True)
         update_data["updated_at"] = datetime.utcnow()
+        previous = None
         if update_data.get("task_list_id"):
+            if update_data["task_list_id"] != task_list_id:
+                await DeletionService.ensure_parents(task_list_ids=[update_data["task_list_id"]])
             update_data["task_list_id"] = ObjectId(
                 update_data.get("task_list_id"))
+            previous = await task_collection.find_one(TaskService._match(task_id, task_list_id), {"task_list_id": 1})
+            if previous and previous["task_list_id"] == update_data["task_list_id"]:
+                previous = None
+            elif previous:
+                # A task joining another list goes to its end, as a move without neighbours does.
+                update_data["sort_number"] = await SequenceService.reserve(update_data["task_list_id"])
+                update_data["rank"] = rank_from_index(update_data["sort_number"])
 
-        result = await task_collection.update_one({"_id": ObjectId(task_id)}, {"$set": update_data})
+        result = await task_collection.update_one(TaskService._match(task_id, task_list_id), {"$set": update_data})
 
         if result.modified_count == 0:
             raise HTTPException(
                 status_code=404, detail="Task not found or no changes")
-        return await TaskService.find_by_id(task_id)
+        if previous:
+            invalidate_count("tasks", previous["task_list_id"])
+            invalidate_count("tasks", update_data["task_list_id"])
+
+        task = await TaskService.find_by_id(task_id)
+        await TaskService._publish_change(
+            task_id, task.task_list_id, previous["task_list_id"] if previous else task.task_list_id,
+            "task.updated", task=task.model_dump(by_alias=True))
+        return task
     
     @staticmethod
-    async def delete(task_id: str):
-        result = await task_collection.delete_one({"_id": ObjectId(task_id)})
-        if result.deleted_count == 0:
+    async def delete(task_id: str, task_list_id: Optional[str] = None):
+        task = await task_collection.find_one_and_delete(
+            TaskService._match(task_id, task_list_id), projection={"task_list_id": 1})
+        if not task:
             raise HTTPException(
                 status_code=404, detail="Task not found")
+        invalidate_count("tasks", task["task_list_id"])
+        for plan_id in await invalidate_task_list_boards(task["task_list_id"]):
+            await SyncService.record_deletion(plan_id, "task", task_id)
+            publish(plan_id, "task.deleted", task_id=task_id, task_list_id=task["task_list_id"])
 
         return {"message": "Task deleted successfully"}
 
     @staticmethod
-    async def bulk_update(data: TaskBulkUpdateRequest):
+    async def bulk_update(data: TaskBulkUpdateRequest, plan_id: Optional[str] = None):
+        """Apply a submitted ordering, writing only the tasks whose position changed.
+        `plan_id` is the plan the route has already checked.
+        """
+        try:
+            submitted = {
+                ObjectId(item.id): (ObjectId(item.task_list_id), item.sort_number)
+                for item in data.tasks
+            }
+        except Exception as e:
+            raise HTTPException(
+                status_code=400, detail=f"Invalid ID format: {e}")
+        await DeletionService.ensure_parents(
+            task_list_ids={task_list_id for task_list_id, _ in submitted.values()}, verified_plan_id=plan_id)
+
+        stored = {
+            task["_id"]: task
+            async for task in task_collection.find(
+                {"_id": {"$in": list(submitted)}},
+                {"task_list_id": 1, "sort_number": 1, "rank": 1})
+        }
+
+        updated_at = datetime.utcnow()
+        results = {}
         bulk_ops = []
+        next_by_task_list = {}
+        for task_id, (task_list_id, sort_number) in submitted.items():
+            task = stored.get(task_id)
+            if not task:
+                results[task_id] = "not_found"
+                continue
 
-        for item in data.tasks:
+            rank = rank_from_index(sort_number)
+            if (task["task_list_id"], task.get("sort_number"), task.get("rank")) == (task_list_id, sort_number, rank):
+                results[task_id] = "unchanged"
+                continue
+
+            results[task_id] = "updated"
+            next_by_task_list[task_list_id] = max(
+                next_by_task_list.get(task_list_id, 0), sort_number + 1)
+            bulk_ops.append((task_id, UpdateOne(
+                {"_id": task_id},
+                {"$set": {
+                    "task_list_id": task_list_id,
+                    "sort_number": sort_number,
+                    "rank": rank,
+                    "updated_at": updated_at,
+                }}
+            )))
+
+        matched = modified = 0
+        for start in range(0, len(bulk_ops), BULK_CHUNK_SIZE):
+            chunk = bulk_ops[start:start + BULK_CHUNK_SIZE]
             try:
-                bulk_ops.append(
-                    UpdateOne(
-                        {"_id": ObjectId(item.id)},
-                        {
-                            "$set": {
-                                "task_list_id": ObjectId(item.task_list_id),
-                                "sort_number": item.sort_number,
-                                "updated_at": datetime.utcnow(),
-                            }
-                        }
-                    )
-                )
-            except Exception as e:
-                raise HTTPException(
-                    status_code=400, detail=f"Invalid ID format: {e}")
+                result = await task_collection.bulk_write([op for _, op in chunk], ordered=False)
+                matched += result.matched_count
+                modified += result.modified_count
+            except BulkWriteError as e:
+                matched += e.details.get("nMatched", 0)
+                modified += e.details.get("nModified", 0)
+                for error in e.details.get("writeErrors", []):
+                    results[chunk[error["index"]][0]] = "failed"
 
         if bulk_ops:
-            result = await task_collection.bulk_write(bulk_ops)
-            return {
-                "matched": result.matched_count,
-                "modified": result.modified_count,
+            await SequenceService.advance(next_by_task_list)
+            invalidate_count("tasks")
+            plan_ids = await task_list_plan_ids(
+                *next_by_task_list, *(stored[task_id]["task_list_id"] for task_id, _ in bulk_ops))
+            await invalidate_boards(*plan_ids.values())
+
+            moved_by_plan = {}
+            for task_id, _ in bulk_ops:
+                if results[task_id] != "updated":
+                    continue
+                task_list_id, sort_number = submitted[task_id]
+                plan_id = plan_ids.get(task_list_id)
+                previous_task_list_id = stored[task_id]["task_list_id"]
+                previous_plan_id = plan_ids.get(previous_task_list_id)
+                if previous_plan_id and previous_plan_id != plan_id:
+                    await SyncService.record_deletion(previous_plan_id, "task", task_id)
+                    publish(previous_plan_id, "task.deleted", task_id=str(task_id),
+                            task_list_id=previous_task_list_id)
+                if plan_id:
+                    moved_by_plan.setdefault(plan_id, []).append(
+                        {"_id": task_id, "task_list_id": task_list_id, "sort_number": sort_number,
+                         "rank": rank_from_index(sort_number)})
+            for plan_id, moved in moved_by_plan.items():
+                publish(plan_id, "tasks.reordered", tasks=moved)
+
+        return {
+            "matched": matched,
+            "modified": modified,
+            "results": [{"id": str(task_id), "status": status} for task_id, status in results.items()],
+        }
+
+    @staticmethod
+    async def move(task_id: str, data: TaskMoveRequest, task_list_id: Optional[str] = None):
+        """Place a task between two neighbours by giving it a new rank key.
+        Only the moved task is written; a missing neighbour is looked up in the target list,
+        and a task moved to the end of a list takes the list's next sort number.
+        `task_list_id` is the list the task is moved from. Neighbours that are gone or out of
+        order mean the client's view is stale, which is a 409 so it refetches and retries.
+        """
+        try:
+            task_obj_id = ObjectId(task_id)
+            task_list_obj_id = ObjectId(data.task_list_id)
+            before_id = ObjectId(data.before_id) if data.before_id else None
+            after_id = ObjectId(data.after_id) if data.after_id else None
+        except Exception as e:
+            raise HTTPException(
+                status_code=400, detail=f"Invalid ID format: {e}")
+        if data.task_list_id != task_list_id:
+            await DeletionService.ensure_parents(task_list_ids=[task_list_obj_id])
+
+        before, after = await TaskService._find_neighbours(
+            task_obj_id, task_list_obj_id, before_id, after_id)
+
+        update_data = {"task_list_id": task_list_obj_id,
+                       "updated_at": datetime.utcnow()}
+        if after:
+            try:
+                update_data["rank"] = rank_between(
+                    before["rank"] if before else None, after["rank"])
+            except ValueError:
+                raise HTTPException(
+                    status_code=409, detail="before_id must be ranked above after_id")
+        else:
+            update_data["sort_number"] = await SequenceService.reserve(task_list_obj_id)
+            update_data["rank"] = rank_from_index(update_data["sort_number"])
+        rank = update_data["rank"]
+
+        task = await task_collection.find_one_and_update(
+            TaskService._match(task_obj_id, task_list_id),
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE
+        )
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        invalidate_count("tasks")
+        previous_task_list_id = task["task_list_id"]
+        task.update(update_data)
+        response = TaskResponse(**prepare_mongo_document(task))
+        await TaskService._publish_change(
+            task_id, task_list_obj_id, previous_task_list_id, "task.moved",
+            task=response.model_dump(by_alias=True), from_task_list_id=previous_task_list_id)
+
+        if len(rank) > current_settings().rank_rebalance_length:
+            TaskService.schedule_rebalance(task_list_obj_id)
+
+        return response
+
+    @staticmethod
+    async def _publish_change(task_id: str, task_list_id, previous_task_list_id, event_type: str, **payload):
+        """Invalidate and notify the boards of a task's list and of the list it left.
+        A plan the task has left records a tombstone and gets task.deleted instead.
+        """
+        plan_ids = await task_list_plan_ids(task_list_id, previous_task_list_id)
+        await invalidate_boards(*plan_ids.values())
+        plan_id = plan_ids.get(ObjectId(task_list_id))
+        previous_plan_id = plan_ids.get(ObjectId(previous_task_list_id))
+        if previous_plan_id and previous_plan_id != plan_id:
+            await SyncService.record_deletion(previous_plan_id, "task", task_id)
+            publish(previous_plan_id, "task.deleted", task_id=str(task_id),
+                    task_list_id=previous_task_list_id)
+        if plan_id:
+            publish(plan_id, event_type, **payload)
+
+    @staticmethod
+    async def _find_neighbours(task_obj_id: ObjectId, task_list_obj_id: ObjectId, before_id: ObjectId = None, after_id: ObjectId = None):
+        projection = {"task_list_id": 1, "rank": 1}
+        given_ids = [neighbour_id for neighbour_id in (before_id, after_id) if neighbour_id]
+        neighbours = {
+            neighbour["_id"]: neighbour
+            async for neighbour in task_collection.find({"_id": {"$in": given_ids}}, projection)
+        }
+        if len(neighbours) != len(given_ids) or any(
+                neighbour["task_list_id"] != task_list_obj_id for neighbour in neighbours.values()):
+            raise HTTPException(
+                status_code=409, detail="Neighbour tasks must exist in the target task list")
+
+        if any(not neighbour.get("rank") for neighbour in neighbours.values()):
+            # Legacy list without rank keys: backfill it once, then read the keys again.
+            await TaskService.rebalance(task_list_obj_id)
+            neighbours = {
+                neighbour["_id"]: neighbour
+                async for neighbour in task_collection.find({"_id": {"$in": given_ids}}, projection)
             }
 
-        return {"matched": 0, "modified": 0}
\ No newline at end of file
+        before = neighbours.get(before_id)
+        after = neighbours.get(after_id)
+        others = {"task_list_id": task_list_obj_id, "_id": {"$ne": task_obj_id}}
+
+        if before and not after:
+            after = await task_collection.find_one(
+                {**others, "rank": {"$gt": before["rank"]}}, projection, sort=[("rank", 1)])
+        elif after and not before:
+            before = await task_collection.find_one(
+                {**others, "rank": {"$lt": after["rank"]}}, projection, sort=[("rank", -1)])
+
+        return before, after
+
+    @staticmethod
+    async def rebalance(task_list_id):
+        """Rewrite the rank keys of a list as evenly spaced fixed-width keys, keeping its order.
+        Open boards receive the new keys as one tasks.reordered event.
+        """
+        task_list_obj_id = ObjectId(task_list_id)
+        tasks_cursor = task_collection.find(
+            {"task_list_id": task_list_obj_id}, {"_id": 1}).sort(TASK_ORDER)
+
+        updated_at = datetime.utcnow()
+        bulk_ops = []
+        positions = []
+        index = 0
+        async for task in tasks_cursor:
+            rank = rank_from_index(index)
+            # updated_at moves the board ETag and brings the new keys into /changes.
+            bulk_ops.append(UpdateOne(
+                {"_id": task["_id"], "task_list_id": task_list_obj_id},
+                {"$set": {"rank": rank, "sort_number": index, "updated_at": updated_at}}
+            ))
+            positions.append({"_id": task["_id"], "task_list_id": task_list_obj_id,
+                              "sort_number": index, "rank": rank})
+            index += 1
+            if len(bulk_ops) == BULK_CHUNK_SIZE:
+                await task_collection.bulk_write(bulk_ops, ordered=False)
+                bulk_ops = []
+
+        if bulk_ops:
+            await task_collection.bulk_write(bulk_ops, ordered=False)
+        await SequenceService.advance({task_list_obj_id: index})
+        for plan_id in await invalidate_task_list_boards(task_list_obj_id):
+            publish(plan_id, "tasks.reordered", tasks=positions)
+
+    @staticmethod
+    def schedule_rebalance(task_list_id):
+        spawn(TaskService.rebalance(task_list_id))
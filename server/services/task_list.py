@@ -1,25 +1,48 @@
 from ..db.db import task_list_collection, task_collection
-from ..schemas.task_list import TaskListCreate, TaskListResponse, TaskListUpdate, TaskListWithTasksResponse
-from ..schemas.common import prepare_mongo_document
-from ..schemas.task import TaskResponse
+from ..schemas.task_list import TaskListCreate, TaskListResponse, TaskListUpdate, TASK_LIST_PROJECTION
+from ..schemas.task import TaskResponse, TASK_PROJECTION
+from ..schemas.common import prepare_mongo_document, CountMode
+from ..db.pagination import find_page, count_documents, invalidate_count
+from ..db.search import text_search
+from ..db.fields import sparse_projections
+from .task import TASK_ORDER
+from .deletion import DeletionService
+from .board_cache import invalidate_boards, forget_task_list
+from ..core.events import publish
+from .sync import SyncService
 from ..models.task_list import TaskList
+from ..core.tracing import traced
 from fastapi import HTTPException
 from datetime import datetime
 from bson import ObjectId
+from typing import Optional
 
 
+@traced
 class TaskListService:
     @staticmethod
-    async def create(task_list: TaskListCreate):
+    async def create(task_list: TaskListCreate, plan_id: Optional[str] = None):
+        # `plan_id` is the plan the route has already checked; another one is looked up here.
+        if task_list.plan_id != plan_id:
+            await DeletionService.ensure_parents(task_list.plan_id)
         task_list_data = TaskList(title=task_list.title, description=task_list.description, plan_id=task_list.plan_id,
                                   created_at=datetime.utcnow(), updated_at=datetime.utcnow()).model_dump()
         result = await task_list_collection.insert_one(task_list_data)
         task_list_data["_id"] = result.inserted_id
+        invalidate_count("task_lists", task_list.plan_id)
+        await invalidate_boards(task_list.plan_id)
 
-        return TaskListResponse(**prepare_mongo_document(task_list_data))
+        response = TaskListResponse(**prepare_mongo_document(task_list_data))
+        publish(task_list.plan_id, "task_list.created", task_list=response.model_dump(by_alias=True))
+        return response
 
     @staticmethod
-    async def find_all_with_pagination(plan_id: str = None, limit: int = 10, skip: int = 0, search: str = "", include_tasks: bool = False):
+    async def find_all_with_pagination(plan_id: str = None, limit: int = 10, skip: int = 0, search: str = "", include_tasks: bool = False, cursor: Optional[str] = None, count_mode: CountMode = CountMode.exact, fields: Optional[str] = None):
+        """List task lists as projected raw documents, ready for MongoJSONResponse."""
+        projections = sparse_projections(fields, {
+            "": (TaskListResponse, None),
+            "tasks": (TaskResponse, "task_list_id"),
+        })
         query = {}
 
         if plan_id:
@@ -30,60 +53,63 @@ class TaskListService:
                     status_code=400, detail="Invalid plan_id")
             query = {"plan_id": plan_obj_id}
 
+        search = text_search(search)
         if search:
-            query["title"] = {"$regex": search, "$options": "i"}
+            if not plan_id:
+                raise HTTPException(
+                    status_code=400, detail="Search requires a plan_id")
+            query["$text"] = search
 
-        total_count = await task_list_collection.count_documents(query)
+        total_count = await count_documents(task_list_collection, query, count_mode,
+                                            cache_key=None if search else ("task_lists", plan_id))
 
-        task_list_cursor = task_list_collection.find(query).skip(
-            skip).limit(limit).sort("created_at", -1)
+        task_lists, next_cursor = await find_page(
+            task_list_collection, query, limit=limit, skip=skip, cursor=cursor, ranked=bool(search),
+            projection=projections[""])
 
         if include_tasks:
-            task_lists_with_tasks = []
-            async for task_list in task_list_cursor:
-                task_list_dict = prepare_mongo_document(task_list)
-
-                tasks_cursor = task_collection.find(
-                    {"task_list_id": ObjectId(task_list_dict["_id"])})
-                tasks = [TaskResponse(**prepare_mongo_document(task)) async for task in tasks_cursor]
-
-                task_list_dict["tasks"] = tasks
-                task_lists_with_tasks.append(
-                    TaskListWithTasksResponse(**task_list_dict))
-
-        else:
-            task_lists = [TaskListResponse(**prepare_mongo_document(task_list)) async for task_list in task_list_cursor]
+            tasks_by_task_list = await TaskListService.group_tasks_by_task_list(
+                [task_list["_id"] for task_list in task_lists], projection=projections["tasks"])
+            for task_list in task_lists:
+                task_list["tasks"] = tasks_by_task_list[task_list["_id"]]
 
-        return {"data":  task_lists_with_tasks if include_tasks else task_lists, "count": total_count}
+        return {"data": task_lists, "count": total_count, "next_cursor": next_cursor}
 
     @staticmethod
-    async def find_all_with_tasks(plan_id: str = None):
-        query = {}
+    async def group_task_lists_by_plan(plan_ids: list, projection: dict = TASK_LIST_PROJECTION, task_projection: dict = TASK_PROJECTION):
+        """Fetch the task lists of several plans, with their tasks, in two queries.
+        Returns a dict of plan_id -> raw task list documents carrying a "tasks" key.
+        """
+        task_lists_by_plan = {plan_id: [] for plan_id in plan_ids}
+        if not plan_ids:
+            return task_lists_by_plan
 
-        if plan_id:
-            try:
-                plan_obj_id = ObjectId(plan_id)
-            except Exception:
-                raise HTTPException(
-                    status_code=400, detail="Invalid plan_id")
-            query = {"plan_id": plan_obj_id}
+        task_lists = await task_list_collection.find(
+            {"plan_id": {"$in": plan_ids}}, projection).to_list(length=None)
+        tasks_by_task_list = await TaskListService.group_tasks_by_task_list(
+            [task_list["_id"] for task_list in task_lists], projection=task_projection)
 
-        task_list_cursor = task_list_collection.find(
-            query)
+        for task_list in task_lists:
+            task_list["tasks"] = tasks_by_task_list[task_list["_id"]]
+            task_lists_by_plan[task_list["plan_id"]].append(task_list)
 
-        task_lists_with_tasks = []
-        async for task_list in task_list_cursor:
-            task_list_dict = prepare_mongo_document(task_list)
+        return task_lists_by_plan
 
-            tasks_cursor = task_collection.find(
-                {"task_list_id": ObjectId(task_list_dict["_id"])})
-            tasks = [TaskResponse(**prepare_mongo_document(task)) async for task in tasks_cursor]
+    @staticmethod
+    async def group_tasks_by_task_list(task_list_ids: list, projection: dict = TASK_PROJECTION):
+        """Fetch the tasks of several task lists in one query.
+        Returns a dict of task_list_id -> raw task documents in board (rank) order.
+        """
+        tasks_by_task_list = {task_list_id: [] for task_list_id in task_list_ids}
+        if not task_list_ids:
+            return tasks_by_task_list
 
-            task_list_dict["tasks"] = tasks
-            task_lists_with_tasks.append(
-                TaskListWithTasksResponse(**task_list_dict))
+        tasks_cursor = task_collection.find(
+            {"task_list_id": {"$in": task_list_ids}}, projection).sort(TASK_ORDER)
+        async for task in tasks_cursor:
+            tasks_by_task_list[task["task_list_id"]].append(task)
 
-        return task_lists_with_tasks
+        return tasks_by_task_list
 
     @staticmethod
     async def find_by_id(task_list_id: str):
@@ -94,26 +120,58 @@ class TaskListService:
         return TaskListResponse(**prepare_mongo_document(task_list))
 
     @staticmethod
-    async def update(task_list_id: str, data: TaskListUpdate):
+    async def update(task_list_id: str, data: TaskListUpdate, plan_id: Optional[str] = None):
         update_data = data.model_dump(exclude_unset=True)
         update_data["updated_at"] = datetime.utcnow()
 
+        # The plan the list leaves; the edit dialog also sends plan_id when it is unchanged.
+        moved_from = None
         if data.plan_id:
+            if data.plan_id != plan_id:
+                await DeletionService.ensure_parents(data.plan_id)
             update_data["plan_id"] = ObjectId(update_data["plan_id"])
+            previous = await task_list_collection.find_one({"_id": ObjectId(task_list_id)}, {"plan_id": 1})
+            if previous and previous["plan_id"] != update_data["plan_id"]:
+                moved_from = previous["plan_id"]
 
         result = await task_list_collection.update_one({"_id": ObjectId(task_list_id)}, {"$set": update_data})
 
         if result.modified_count == 0:
             raise HTTPException(
                 status_code=404, detail="Task list not found or no changes")
-        return await TaskListService.find_by_id(task_list_id)
+        if moved_from:
+            invalidate_count("task_lists")
+            forget_task_list(task_list_id)
+            await invalidate_boards(moved_from)
+            await SyncService.record_deletion(moved_from, "task_list", task_list_id)
+            publish(moved_from, "task_list.deleted", task_list_id=task_list_id)
+            # Its tasks come along unchanged; stamping them brings them into the new plan's /changes.
+            await task_collection.update_many({"task_list_id": ObjectId(task_list_id)},
+                                              {"$set": {"updated_at": update_data["updated_at"]}})
+
+        task_list = await TaskListService.find_by_id(task_list_id)
+        await invalidate_boards(task_list.plan_id)
+        publish(task_list.plan_id, "task_list.updated", task_list=task_list.model_dump(by_alias=True))
+        return task_list
 
     @staticmethod
     async def delete(task_list_id: str):
-        result = await task_list_collection.delete_one({"_id": ObjectId(task_list_id)})
-        if result.deleted_count == 0:
+        # Recorded before the list goes, so its Tasks always have a job to remove them
+        job = await DeletionService.create("task_list", task_list_id)
+        task_list = await task_list_collection.find_one_and_delete(
+            {"_id": ObjectId(task_list_id)}, projection={"plan_id": 1})
+        if not task_list:
+            await DeletionService.discard(job)
             raise HTTPException(
                 status_code=404, detail="Task list not found")
-        await task_collection.delete_many({"task_list_id": ObjectId(task_list_id)})
+        invalidate_count("task_lists", task_list["plan_id"])
+        await invalidate_boards(task_list["plan_id"])
+        forget_task_list(task_list_id)
+        await SyncService.record_deletion(task_list["plan_id"], "task_list", task_list_id)
+        publish(task_list["plan_id"], "task_list.deleted", task_list_id=task_list_id)
+
+        # Its Tasks are removed in the background
+        DeletionService.start(job)
 
-        return {"message": "Task list deleted successfully"}
\ No newline at end of file
+        return {"message": "Task list deleted, its tasks are being removed",
+                "job_id": str(job["_id"])}
\ No newline at end of file
@@ -1,47 +1,56 @@
 from ..db.db import user_collection 
 from ..schemas.user import UserCreate, UserResponse , UserUpdate
-from ..schemas.common import prepare_mongo_document
+from ..schemas.common import prepare_mongo_document, CountMode
+from ..db.pagination import find_page, count_documents, invalidate_count
+from ..db.search import text_search, email_filter
 from ..models.user import User
 from fastapi import HTTPException
 from ..core.security import get_password_hash
+from ..core.context import current
+from ..core.tracing import traced
 from datetime import datetime
 from bson import ObjectId
+from typing import Optional
 
 
+@traced
 class UserService:
     @staticmethod
     async def create(user : UserCreate):
         if await user_collection.find_one({
-            "email" : user.email
+            "email" : email_filter(user.email)
         }):
             raise HTTPException(
                 status_code=400,
                 detail="Email already registered"
             )
-        hashed_pass = get_password_hash(user.password)
+        hashed_pass = await get_password_hash(user.password)
         user_data = User(username=user.username,
-                         email=user.email, password=hashed_pass, created_at=datetime.utcnow(), updated_at=datetime.utcnow()).model_dump()
+                         email=user.email.lower(), password=hashed_pass, created_at=datetime.utcnow(), updated_at=datetime.utcnow()).model_dump()
         result = await user_collection.insert_one(user_data)
         user_data["_id"] = result.inserted_id
+        invalidate_count("users")
         
         return UserResponse(**prepare_mongo_document(user_data))
 
     @staticmethod
-    async def find_all(limit: int = 10, skip: int = 0, search: str = "", email: str = ""):
+    async def find_all(limit: int = 10, skip: int = 0, search: str = "", email: str = "", cursor: Optional[str] = None, count_mode: CountMode = CountMode.exact):
         query = {}
 
+        search = text_search(search)
         if search:
-            query["username"] = {"$regex": search, "$options": "i"}
+            query["$text"] = search
 
         if email:
-            query["email"] = {"$regex": f"^{email}$", "$options": "i"}
-        total_count = await user_collection.count_documents(query)
+            query["email"] = email_filter(email)
+        total_count = await count_documents(user_collection, query, count_mode,
+                                            cache_key=None if query else ("users", None))
 
-        user_cursor = user_collection.find(query).skip(
-            skip).limit(limit).sort("created_at", -1)
+        users, next_cursor = await find_page(
+            user_collection, query, limit=limit, skip=skip, cursor=cursor, ranked=bool(search))
 
-        users = [UserResponse(**prepare_mongo_document(user)) async for user in user_cursor]
-        return {"data": users, "count": total_count}
+        users = [UserResponse(**prepare_mongo_document(user)) for user in users]
+        return {"data": users, "count": total_count, "next_cursor": next_cursor}
 
 
     @staticmethod
@@ -53,19 +62,44 @@ class UserService:
         return UserResponse(**prepare_mongo_document(user))
 
 
+    @staticmethod
+    async def get_user_by_id(user_id: str):
+        """Resolve the authenticated user, served from the principal cache when possible.
+        Returns None for an unknown or malformed id.
+        """
+        user = current().principal_cache.get(user_id)
+        if user is not None:
+            return user
+
+        if not user_id or not ObjectId.is_valid(user_id):
+            return None
+        user = await user_collection.find_one({"_id": ObjectId(user_id)})
+        if not user:
+            return None
+
+        user = UserResponse(**prepare_mongo_document(user))
+        current().principal_cache.set(user_id, user)
+        return user
+
     @staticmethod
     async def find_with_pass_by_email(email: str):
-        user = await user_collection.find_one({"email": email})
+        user = await user_collection.find_one({"email": email_filter(email)})
         if user:
             return user
         else:
             return None
     
+    @staticmethod
+    async def update_password_hash(user_id, hashed_password: str):
+        await user_collection.update_one({"_id": ObjectId(user_id)}, {"$set": {"password": hashed_password}})
+
     @staticmethod
     async def update(user_id: str, data: UserUpdate):
         update_data = data.model_dump(exclude_unset=True)
+        if update_data.get("email"):
+            update_data["email"] = update_data["email"].lower()
         if "password" in update_data:
-            update_data["password"] = get_password_hash(
+            update_data["password"] = await get_password_hash(
                 update_data["password"])
         update_data["updated_at"] = datetime.utcnow()
 
@@ -74,6 +108,7 @@ class UserService:
         if result.modified_count == 0:
             raise HTTPException(
                 status_code=404, detail="User not found or no changes")
+        current().principal_cache.invalidate(user_id)
         return await UserService.find_by_id(user_id)
     
     
@@ -83,5 +118,7 @@ class UserService:
         if result.deleted_count == 0:
             raise HTTPException(
                 status_code=404, detail="User not found")
+        invalidate_count("users")
+        current().principal_cache.invalidate(user_id)
 
         return {"message": "User deleted successfully"}
\ No newline at end of file
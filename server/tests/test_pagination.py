@@ -0,0 +1,25 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from ..db.pagination import find_page
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+
+def test_sparse_listing_pages_through_every_document():
+    collection = mongomock_motor.AsyncMongoMockClient()["taskboard"]["plans"]
+    start = datetime(2025, 1, 1)
+
+    async def pages():
+        await collection.insert_many([{"title": f"Plan {index}", "created_at": start + timedelta(minutes=index)}
+                                      for index in range(5)])
+        titles, cursor = [], None
+        while True:
+            page, cursor = await find_page(collection, {}, limit=2, cursor=cursor,
+                                           projection={"_id": 1, "title": 1})
+            assert all(set(doc) == {"_id", "title"} for doc in page)
+            titles += [doc["title"] for doc in page]
+            if cursor is None:
+                return titles
+
+    assert asyncio.run(pages()) == [f"Plan {index}" for index in range(4, -1, -1)]